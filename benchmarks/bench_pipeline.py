@@ -0,0 +1,254 @@
+"""Benchmark structured notes processing and agenda generation stage by stage.
+
+Generates synthetic inputs at several scales (allocation workbooks with
+messy account formats, GBIL/Cash exports, agenda JSON), times
+
+    scripts.structured_notes.StructuredNotesProcessor.process_files
+    sideproject.StructuredNotesProcessor.process
+    scripts.agenda_gen.populate_template
+
+per stage (the processors' instrumentation spans), and appends one JSON
+object per measurement to bench_output.txt so runs on different commits
+can be compared. Processors are timed once with an empty parse cache
+(cold) and then with it filled (warm).
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline [--rows 1000,10000,50000] [--sheets 3]
+        [--width 12] [--accounts 10,100,1000] [--repeat 3] [--output bench_output.txt]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+from openpyxl import Workbook
+from utils import parse_cache
+import sideproject
+from scripts import agenda_gen
+from scripts.structured_notes import StructuredNotesProcessor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "bench_output.txt")
+# Account, GBIL and Cash columns plus the date cell in L2
+MIN_WIDTH = 12
+ACCOUNT_FORMATS = [
+    lambda n: str(n),
+    lambda n: f"00{n}",
+    lambda n: f"{str(n)[:4]}-{str(n)[4:]}",
+    lambda n: n,
+    lambda n: float(n),
+]
+
+
+# --- Synthetic inputs --------------------------------------------------------
+
+def make_accounts(count, seed=0):
+    """Unique eight-digit account numbers."""
+    return random.Random(seed).sample(range(10**7, 10**8), count)
+
+
+def make_allocations_workbook(path, accounts, sheets=3, width=MIN_WIDTH, seed=0):
+    """Write an allocations workbook; the far-right sheet is the one processed.
+
+    Every sheet has the same layout: Client, Account, Asset Value, GBIL
+    Available, Cash in Account, then filler columns up to width, with the
+    account numbers in a random mix of text, zero-padded, dashed, int and
+    float forms.
+    """
+    rng = random.Random(seed)
+    width = max(width, MIN_WIDTH)
+    wb = Workbook(write_only=True)
+    header = ["Client", "Account", "Asset Value", "GBIL Available", "Cash in Account"]
+    header += [f"Column {i}" for i in range(len(header) + 1, width + 1)]
+    for sheet in range(sheets):
+        ws = wb.create_sheet(f"2024-{sheet + 1:02d}")
+        ws.append(header)
+        for i, account in enumerate(accounts):
+            row = [f"Client {i}", rng.choice(ACCOUNT_FORMATS)(account), round(rng.random() * 1e6, 2), None, None]
+            row += [rng.randint(0, 1000) for _ in range(width - len(row))]
+            ws.append(row)
+    wb.save(path)
+
+
+def make_custodian_csvs(gbil_path, cash_path, accounts, seed=0):
+    """Write GBIL and Cash exports covering a random subset of accounts.
+
+    GBIL codes carry an 'XX' prefix and dashes on about half the rows and
+    amounts are formatted as currency text, as in the real exports.
+    """
+    rng = random.Random(seed)
+    gbil = [
+        (f"XX{str(a)[:3]}-{str(a)[3:]}" if rng.random() < .5 else str(a),
+         f"${rng.random() * 1e5:,.2f}", "other")
+        for a in accounts if rng.random() < .7
+    ]
+    pd.DataFrame(gbil, columns=["Acct Code", "Asset Value", "Other"]).to_csv(gbil_path, index=False)
+    cash = [
+        (f"0{a}", f"{rng.random() * 1e4:,.2f}", "other")
+        for a in accounts if rng.random() < .8
+    ]
+    pd.DataFrame(cash, columns=["Account Number", "Cash Value", "Other"]).to_csv(cash_path, index=False)
+
+
+def make_agenda(accounts, seed=0):
+    """Agenda JSON data for one client with the given number of accounts."""
+    rng = random.Random(seed)
+    return {
+        "client": {"name": "Synthetic Client & Co", "date": "March 5th, 2024"},
+        "summary": {"total_value": "$1,234,567", "total_income": "$12,000"},
+        "accounts": [
+            {
+                "count": i + 1,
+                "last_four": f"{rng.randint(0, 9999):04d}",
+                "account_value": f"${rng.random() * 1e6:,.0f}",
+                "account_cash_flow": f"${rng.random() * 1e4:,.0f}",
+                "account_performance_ytd": f"{rng.random() * 20 - 5:.1f}%",
+                "account_allocation": rng.choice(["60/40", "Growth", "Income"]),
+            }
+            for i in range(accounts)
+        ],
+    }
+
+
+# --- Timing ------------------------------------------------------------------
+
+def isolated_parse_cache(directory):
+    """Point cached_call at a private cache so runs never touch the user's."""
+    os.makedirs(directory, exist_ok=True)
+    parse_cache._default_cache = parse_cache.ParseCache(directory=directory)
+    return parse_cache._default_cache
+
+
+def time_gui_processor(inputs, output_path):
+    processor = StructuredNotesProcessor()
+    processor.original_file, processor.gbil_file, processor.cash_file = inputs
+    start = time.perf_counter()
+    processor.process_files(output_path)
+    total = time.perf_counter() - start
+    spans = sorted(processor.last_spans, key=lambda span: span.start)
+    return {span.name: round(span.seconds, 4) for span in spans}, round(total, 4)
+
+
+def time_sideproject(inputs, output_path):
+    start = time.perf_counter()
+    result = sideproject.StructuredNotesProcessor(*inputs, output_file=output_path, stage=False).process()
+    total = time.perf_counter() - start
+    return result['stages'], round(total, 4)
+
+
+def time_populate_template(data):
+    """Time populate_template's steps plus saving the document to memory."""
+    stages = {}
+    start = last = time.perf_counter()
+
+    def lap(name):
+        nonlocal last
+        now = time.perf_counter()
+        stages[name] = round(now - last, 4)
+        last = now
+
+    lines, _client, _date = agenda_gen.agenda_lines(data)
+    lap("agenda_lines")
+    doc = agenda_gen.load_template()
+    lap("load_template")
+    agenda_gen.write_paragraphs(doc, lines)
+    lap("write_paragraphs")
+    doc.save(io.BytesIO())
+    lap("save")
+    return stages, round(last - start, 4)
+
+
+def best_run(runs):
+    """Fastest (stages, total) of several runs."""
+    return min(runs, key=lambda run: run[1])
+
+
+# --- Driver ------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_processors(work_dir, rows, sheets, width, repeat):
+    accounts = make_accounts(rows, seed=rows)
+    inputs = [os.path.join(work_dir, name) for name in (f"allocations_{rows}.xlsx", f"gbil_{rows}.csv", f"cash_{rows}.csv")]
+    make_allocations_workbook(inputs[0], accounts, sheets, width, seed=rows)
+    make_custodian_csvs(inputs[1], inputs[2], accounts, seed=rows)
+    output_path = os.path.join(work_dir, "output.xlsx")
+    params = {"rows": rows, "sheets": sheets, "width": max(width, MIN_WIDTH)}
+
+    cache = isolated_parse_cache(os.path.join(work_dir, "parse_cache"))
+    for name, fn in (("structured_notes.process_files", time_gui_processor),
+                     ("sideproject.process", time_sideproject)):
+        cache.clear()
+        yield name, dict(params, cache="cold"), fn(inputs, output_path)
+        yield name, dict(params, cache="warm"), best_run([fn(inputs, output_path) for _ in range(repeat)])
+
+
+def bench_agenda(accounts, repeat):
+    data = make_agenda(accounts, seed=accounts)
+    yield "agenda_gen.populate_template", {"accounts": accounts}, best_run(
+        [time_populate_template(data) for _ in range(repeat)])
+
+
+def run(rows_scales, account_scales, sheets, width, repeat, output):
+    # Keep progress and span logging out of the results table
+    logging.disable(logging.INFO)
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    with tempfile.TemporaryDirectory() as work_dir, open(output, "a", encoding="utf-8") as out:
+        measurements = []
+        for rows in rows_scales:
+            measurements.append(bench_processors(work_dir, rows, sheets, width, repeat))
+        for accounts in account_scales:
+            measurements.append(bench_agenda(accounts, repeat))
+
+        for results in measurements:
+            for name, params, (stages, total) in results:
+                out.write(json.dumps(dict(meta, benchmark=name, params=params, total=total, stages=stages)) + "\n")
+                out.flush()
+                scale = ", ".join(f"{key}={value}" for key, value in params.items())
+                print(f"{name:32} {scale:40} {total:8.3f}s")
+                for stage, seconds in stages.items():
+                    print(f"    {stage:44} {seconds:8.3f}s")
+    print(f"Results appended to {output}")
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=_int_list, default=[1000, 10000, 50000],
+                        help="allocation rows per sheet, comma separated")
+    parser.add_argument("--sheets", type=int, default=3, help="sheets per workbook")
+    parser.add_argument("--width", type=int, default=MIN_WIDTH, help="columns per sheet")
+    parser.add_argument("--accounts", type=_int_list, default=[10, 100, 1000],
+                        help="accounts per agenda, comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="warm runs per measurement; the best is kept")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON lines file to append results to")
+    args = parser.parse_args(argv)
+    run(args.rows, args.accounts, args.sheets, args.width, args.repeat, args.output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,44 @@
+import time
+
+# Taken before the heavy imports below so the startup time includes them
+LAUNCH_TIME = time.perf_counter()
+
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QSplitter, QMessageBox
-from PyQt5.QtCore import Qt
+import importlib
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QSplitter,
+                             QMessageBox, QProgressDialog, QAction, QActionGroup)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 from ui.sidebar import Sidebar
 from ui.script_loader import ScriptLoader
+from ui.import_report import ImportReportDialog
+from ui.profile_viewer import ProfileViewerDialog
 from utils.theme import Theme
+from utils.config import get_setting
+from utils.log_config import configure_logging
+from utils.lazy_import import HEAVY_MODULES, prewarm
+from utils import profiler
+from utils.script_runner import default_runner
+from utils.script_watcher import ScriptWatcher
+
+# Scripts at the top of the sidebar, imported in the background at startup
+PREWARM_SCRIPTS = 3
 
 class ElkRunApp(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.script_runner = default_runner()
+        self.progress_dialogs = {}
+        self.startup_seconds = None
+        self.import_report_dialog = None
+        self.profile_viewer = None
         self.initUI()
 
     def initUI(self):
         # Set window title and size
         self.setWindowTitle("ElkRun Platform")
         self.setGeometry(100, 100, 1200, 800)
-        
-        # Apply theme
-        self.setStyleSheet(Theme.MAIN_WINDOW_STYLE.format(**Theme.get_style_params()))
 
         # Load and set icon
         try:
@@ -39,11 +59,6 @@ class ElkRunApp(QMainWindow):
         # Create splitter for sidebar and main content
         splitter = QSplitter(Qt.Horizontal)
         splitter.setHandleWidth(1)
-        splitter.setStyleSheet("""
-            QSplitter::handle {
-                background-color: #e0e0e0;
-            }
-        """)
         
         # Add sidebar and script loader
         self.sidebar = Sidebar(self)
@@ -64,36 +79,160 @@ class ElkRunApp(QMainWindow):
         # Connect script execution signal to run_script method
         self.script_loader.script_executed.connect(self.run_script)
 
-    def run_script(self, script_name):
-        processing_dialog = QMessageBox(self)
-        processing_dialog.setWindowTitle("Processing")
-        processing_dialog.setText("Processing files...")
-        processing_dialog.setStandardButtons(QMessageBox.Cancel)
-        processing_dialog.setModal(True)
-        processing_dialog.show()
-        QApplication.processEvents()
+        # Pick up edits to scripts/ without restarting
+        self.script_watcher = None
+        if get_setting("ui", "hot_reload", True):
+            self.script_watcher = ScriptWatcher(self.sidebar.registry, self)
+            self.script_watcher.script_added.connect(self.sidebar.add_script)
+            self.script_watcher.script_removed.connect(self.on_script_removed)
+            self.script_watcher.script_changed.connect(self.on_script_changed)
+            self.script_watcher.reload_failed.connect(
+                lambda module, error: self.statusBar().showMessage(f"Could not reload {module}: {error}", 10000))
+
+        # Tools menu
+        report_action = QAction("Import Time Report...", self)
+        report_action.triggered.connect(self.show_import_report)
+        tools_menu = self.menuBar().addMenu("Tools")
+        tools_menu.addAction(report_action)
+
+        # Profiling: per-run .pstats and collapsed stacks under the app data folder
+        profile_action = QAction("Profile Scripts", self, checkable=True)
+        profile_action.setChecked(profiler.is_enabled())
+        profile_action.toggled.connect(self.set_profiling)
+        tools_menu.addAction(profile_action)
+        runs_action = QAction("Profiler Runs...", self)
+        runs_action.triggered.connect(self.show_profile_viewer)
+        tools_menu.addAction(runs_action)
+
+        # Theme switching restyles the whole app with one setStyleSheet
+        theme_menu = tools_menu.addMenu("Theme")
+        theme_group = QActionGroup(self)
+        for theme in Theme.THEMES:
+            action = QAction(theme.capitalize(), self, checkable=True)
+            action.setChecked(theme == Theme.current_theme)
+            action.triggered.connect(lambda _checked, theme=theme: Theme.apply(theme=theme))
+            theme_group.addAction(action)
+            theme_menu.addAction(action)
+
+    def on_script_removed(self, module):
+        self.sidebar.remove_script(module)
+        self.script_loader.evict(module, force=True)
+
+    def on_script_changed(self, info):
+        self.sidebar.update_script(info)
+        self.script_loader.reload_script(info.module)
+        self.statusBar().showMessage(f"Reloaded {info.name}", 5000)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.startup_seconds is None:
+            self.startup_seconds = time.perf_counter() - LAUNCH_TIME
+            # Let the window paint first, then warm imports off the UI thread
+            QTimer.singleShot(0, self.start_prewarm)
+
+    def start_prewarm(self):
+        """Import heavy libraries and the first few scripts in the background."""
+        if not get_setting("startup", "prewarm", True):
+            return
+        scripts = [f"scripts.{info.module}" for info in self.sidebar.registry.scan()[:PREWARM_SCRIPTS]]
+        self.script_runner.submit("prewarm", prewarm, list(HEAVY_MODULES) + scripts)
 
+    def show_import_report(self):
+        if self.import_report_dialog is None:
+            self.import_report_dialog = ImportReportDialog(self, self.startup_seconds)
+        self.import_report_dialog.show_report()
+        self.import_report_dialog.show()
+        self.import_report_dialog.raise_()
+
+    def set_profiling(self, enabled):
+        profiler.set_enabled(enabled)
+        current = self.script_loader.current_script()
+        if enabled and current:
+            self.script_loader.start_ui_profile(current)
+        elif not enabled:
+            self.script_loader.stop_ui_profile()
+        self.statusBar().showMessage(f"Profiling {'on' if enabled else 'off'}", 5000)
+
+    def show_profile_viewer(self):
+        # Save the running GUI profile so it shows up in the list
+        current = self.script_loader.current_script()
+        if self.script_loader.ui_profile is not None and current:
+            self.script_loader.start_ui_profile(current)
+        if self.profile_viewer is None:
+            self.profile_viewer = ProfileViewerDialog(self)
+        self.profile_viewer.refresh()
+        self.profile_viewer.show()
+        self.profile_viewer.raise_()
+
+    def run_script(self, script_name):
+        """Run a script's run() on the worker pool without blocking the UI."""
         try:
-            # Import and execute the script
-            script_module = __import__(f"scripts.{script_name}", fromlist=['run'])
-            if hasattr(script_module, 'run'):
-                script_module.run()
-            processing_dialog.close()
+            script_module = importlib.import_module(f"scripts.{script_name}")
         except Exception as e:
-            processing_dialog.setText(f"An error occurred: {e}")
-            processing_dialog.setIcon(QMessageBox.Critical)
-            processing_dialog.setStandardButtons(QMessageBox.Ok)
-            processing_dialog.exec_()
+            QMessageBox.critical(self, "Error", f"An error occurred: {e}")
+            return
+        if not hasattr(script_module, 'run'):
+            return
+
+        worker = self.script_runner.submit(script_name, script_module.run)
+
+        progress = QProgressDialog(f"Processing {script_name}...", "Cancel", 0, 100, self)
+        progress.setWindowTitle("Processing")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(worker.cancel)
+        self.progress_dialogs[worker.job_id] = progress
+
+        def on_progress(value, message):
+            progress.setValue(value)
+            progress.setLabelText(message)
+
+        def on_finished(_result):
+            self._close_progress(worker.job_id)
+
+        def on_cancelled():
+            self._close_progress(worker.job_id)
+            QMessageBox.information(self, "Cancelled", f"{script_name} was cancelled by user.")
+
+        def on_error(message, details):
+            self._close_progress(worker.job_id)
+            error_box = QMessageBox(self)
+            error_box.setWindowTitle("Processing")
+            error_box.setIcon(QMessageBox.Critical)
+            error_box.setText(f"An error occurred: {message}")
+            error_box.setDetailedText(details)
+            error_box.setStandardButtons(QMessageBox.Ok)
+            error_box.open()
+
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.cancelled.connect(on_cancelled)
+        worker.signals.error.connect(on_error)
+        progress.show()
+
+    def _close_progress(self, job_id):
+        progress = self.progress_dialogs.pop(job_id, None)
+        if progress:
+            progress.canceled.disconnect()
+            progress.close()
+            progress.deleteLater()
 
 def main():
+    configure_logging()
     app = QApplication(sys.argv)
     
     # Set application-wide stylesheet
     app.setStyle("Fusion")  # Use Fusion style for consistent cross-platform look
+    Theme.apply(app, get_setting("ui", "theme", Theme.DEFAULT_THEME))
     
     elk_run_app = ElkRunApp()
     elk_run_app.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    elk_run_app.script_runner.shutdown()
+    elk_run_app.script_loader.stop_ui_profile()
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
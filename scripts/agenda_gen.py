@@ -1,13 +1,86 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QPushButton, QLabel, QFileDialog, QMessageBox, QApplication
 from PyQt5.QtGui import QFont
+import argparse
+import copy
+import itertools
 import json
-from docx import Document
-from datetime import datetime
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import os
+from utils import date_formatter, money
+from utils.docx_writer import append_paragraphs, resolve_style_ids
+from utils.json_parser import iter_json_records
+from utils.lazy_import import lazy_import
+from utils.script_runner import default_runner
+
+docx = lazy_import('docx')
+pd = lazy_import('pandas')
+
+# Sidebar entry, read by utils.script_registry without importing this module
+SCRIPT_META = {
+    "name": "Agenda Gen",
+    "description": "Build client meeting agendas from JSON, one at a time or in bulk.",
+    "order": 10,
+}
 
 # Define the path for the template
 template_path = os.path.join(os.path.dirname(__file__), "../templates/Agenda_Blank_With_Styles.docx")
 
+# Records whose client dates are parsed together in batch runs
+DATE_BLOCK_RECORDS = 512
+
+# Paragraph styles the agenda uses; all must exist in the template
+AGENDA_STYLES = ("TitleAgenda", "DateAgenda", "List_Category", "List_SubCategory", "List_Item")
+
+# Parsed template and its resolved style IDs, reused until the file on disk changes
+_template_cache = {"path": None, "mtime": None, "document": None, "style_ids": None}
+_template_lock = threading.Lock()
+
+def load_template(path=None):
+    """Return a fresh Document cloned from the cached, parsed template.
+
+    The template is unzipped and parsed once per process; later calls
+    deep-copy the parsed tree, which is much cheaper than Document(path).
+    The cache is refreshed when the template's mtime changes.
+    """
+    path = path or template_path
+    mtime = os.path.getmtime(path)
+    with _template_lock:
+        if _template_cache["path"] != path or _template_cache["mtime"] != mtime:
+            _template_cache.update(path=path, mtime=mtime, document=docx.Document(path), style_ids=None)
+        return copy.deepcopy(_template_cache["document"])
+
+def template_style_ids(doc):
+    """Return the agenda style IDs of the cached template, or None if unusable.
+
+    Resolved once per template load. None means a style is missing or
+    ambiguous and paragraphs must go through python-docx instead.
+    """
+    with _template_lock:
+        if _template_cache["style_ids"] is None:
+            try:
+                _template_cache["style_ids"] = resolve_style_ids(doc, AGENDA_STYLES)
+            except (KeyError, ValueError):
+                _template_cache["style_ids"] = False
+        return _template_cache["style_ids"] or None
+
+def write_paragraphs(doc, lines, fast=True):
+    """Append (text, style) lines to doc.
+
+    The direct XML emitter is used when the template's style IDs resolve;
+    otherwise each line goes through doc.add_paragraph. Both produce the
+    same document.xml.
+    """
+    style_ids = template_style_ids(doc) if fast else None
+    if style_ids is not None:
+        append_paragraphs(doc, lines, style_ids)
+        return
+    for text, style in lines:
+        doc.add_paragraph(text, style=style)
+
 def load_ui(parent=None):
     """Set up and return the UI for the agenda generator."""
     widget = QWidget(parent)
@@ -29,6 +102,11 @@ def load_ui(parent=None):
     generate_button.clicked.connect(lambda: generate_agenda(json_textbox.toPlainText(), widget))
     layout.addWidget(generate_button)
 
+    # Batch generation button
+    batch_button = QPushButton("Generate Batch from File...")
+    batch_button.clicked.connect(lambda: generate_batch_from_ui(widget))
+    layout.addWidget(batch_button)
+
     # Status label
     status_label = QLabel()
     layout.addWidget(status_label)
@@ -66,65 +144,219 @@ def load_ui(parent=None):
             status_label.setText(f"Error: {e}")
             QMessageBox.critical(parent, "Error", f"An error occurred: {e}")
 
+    def generate_batch_from_ui(parent):
+        source_path, _ = QFileDialog.getOpenFileName(
+            parent, "Select Client Records", "", "JSON Files (*.json *.jsonl);;All Files (*)")
+        if not source_path:
+            return
+        output_dir = QFileDialog.getExistingDirectory(parent, "Select Output Folder")
+        if not output_dir:
+            return
+
+        batch_button.setEnabled(False)
+        worker = default_runner().submit("agenda_gen.batch", generate_batch, source_path, output_dir)
+        worker.signals.progress.connect(lambda _value, message: status_label.setText(message))
+
+        def on_finished(result):
+            batch_button.setEnabled(True)
+            summary = format_batch_summary(result)
+            status_label.setText(summary)
+            if result["failed"]:
+                details = "\n".join(f"Record {n}: {error}" for n, error in result["failed"][:20])
+                QMessageBox.warning(parent, "Batch Finished With Errors", f"{summary}\n\n{details}")
+            else:
+                QMessageBox.information(parent, "Success", summary)
+
+        def on_error(message, _details):
+            batch_button.setEnabled(True)
+            status_label.setText(f"Error: {message}")
+            QMessageBox.critical(parent, "Error", f"An error occurred: {message}")
+
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(on_error)
+        worker.signals.cancelled.connect(lambda: batch_button.setEnabled(True))
+
     return widget
 
-def populate_template(data):
-    """Generate the agenda document from validated JSON data."""
-    doc = Document(template_path)
-    
+def agenda_lines(data):
+    """Return the agenda as (text, style) lines plus client name and date."""
     # Extract client info
     client_name = data.get("client", {}).get("name", "Unknown Client")
-    client_date = datetime.strptime(data.get("client", {}).get("date", "Unknown Date"), "%B %d, %Y")
-    doc.add_paragraph(f"Agenda: {client_name}", style="TitleAgenda")
-    doc.add_paragraph(client_date.strftime("%B %d, %Y"), style="DateAgenda")
+    client_date = parse_date(data.get("client", {}).get("date", "Unknown Date"))
+    lines = [
+        (f"Agenda: {client_name}", "TitleAgenda"),
+        (client_date.strftime(date_formatter.AGENDA_DATE_FORMAT), "DateAgenda"),
+    ]
 
     # Add summary section
     summary = data.get("summary", {})
     total_value = summary.get("total_value", "$0")
     total_income = summary.get("total_income", "$0")
-    doc.add_paragraph(f"Review Accounts\tTotal Value: {total_value} Income: {total_income}", style="List_Category")
+    lines.append((f"Review Accounts\tTotal Value: {total_value} Income: {total_income}", "List_Category"))
 
     # Add account details
     for account in data.get("accounts", []):
         account_count = account.get("count", "N/A")
         last_four = account.get("last_four", "N/A")
-        doc.add_paragraph(f"Account {account_count} xxxx-{last_four}", style="List_SubCategory")
-        
+        lines.append((f"Account {account_count} xxxx-{last_four}", "List_SubCategory"))
+
         account_value = account.get("account_value", "$0")
         account_cash_flow = account.get("account_cash_flow", "$0")
         account_performance_ytd = account.get("account_performance_ytd", "N/A")
         account_allocation = account.get("account_allocation", "N/A")
-        
-        doc.add_paragraph(f"Total Account:\t{account_value}", style="List_Item")
-        doc.add_paragraph(f"Current Cash Flow:\t{account_cash_flow}", style="List_Item")
-        doc.add_paragraph(f"Performance YTD:\t{account_performance_ytd}", style="List_Item")
-        doc.add_paragraph(f"Allocation:\t{account_allocation}", style="List_Item")
-    
+
+        lines.append((f"Total Account:\t{account_value}", "List_Item"))
+        lines.append((f"Current Cash Flow:\t{account_cash_flow}", "List_Item"))
+        lines.append((f"Performance YTD:\t{account_performance_ytd}", "List_Item"))
+        lines.append((f"Allocation:\t{account_allocation}", "List_Item"))
+
+    return lines, client_name, client_date
+
+def populate_template(data, fast=True):
+    """Generate the agenda document from validated JSON data.
+
+    fast=False forces the python-docx paragraph path.
+    """
+    lines, client_name, client_date = agenda_lines(data)
+    doc = load_template()
+    write_paragraphs(doc, lines, fast=fast)
+
     # Generate output filename based on client name and date
     safe_name = "".join(c for c in client_name if c.isalnum() or c in (' ', '-'))
     output_filename = f"Agenda_{safe_name}_{client_date.strftime('%Y%m%d')}.docx"
-    
+
     return doc, output_filename
 
-def parse_date(date_str):
-    """Parse various date formats to a datetime object."""
-    try:
-        return datetime.strptime(date_str.replace("st", "").replace("nd", "").replace("rd", "").replace("th", ""), "%B %d, %Y")
-    except ValueError:
+def _save_unique(doc, output_dir, filename):
+    """Save doc under filename, adding _2, _3... if the name is taken."""
+    stem, ext = os.path.splitext(filename)
+    candidate, n = filename, 1
+    while True:
+        path = os.path.join(output_dir, candidate)
         try:
-            return datetime.strptime(date_str, "%m/%d/%Y")
-        except ValueError:
+            # O_EXCL reserves the name atomically across worker processes
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+            continue
+        doc.save(path)
+        return path
+
+def render_agenda_file(record, output_dir):
+    """Populate the template for one record and save it into output_dir."""
+    doc, output_filename = populate_template(record)
+    return _save_unique(doc, output_dir, output_filename)
+
+def iter_records_with_dates(source_path, block_size=DATE_BLOCK_RECORDS):
+    """Yield records from source_path with client dates parsed in blocks.
+
+    Each block's dates are parsed in one vectorized call and replaced by
+    ISO strings, so workers never re-detect the format. Dates that do not
+    parse are left untouched for the worker to report against the record.
+    """
+    records = iter_json_records(source_path)
+    while True:
+        block = list(itertools.islice(records, block_size))
+        if not block:
+            return
+        clients = [record.get("client") if isinstance(record, dict) else None for record in block]
+        dated = [client for client in clients if isinstance(client, dict) and isinstance(client.get("date"), str)]
+        parsed = date_formatter.parse_dates([client["date"] for client in dated], errors="coerce")
+        for client, value in zip(dated, parsed):
+            if not pd.isna(value):
+                client["date"] = value.strftime("%Y-%m-%d")
+        yield from block
+
+def generate_batch(source_path, output_dir, workers=None, progress_callback=None, cancel_token=None):
+    """Generate one agenda per record of a JSON array or JSON Lines file.
+
+    Records are streamed from source_path and rendered across a pool of
+    worker processes, each of which keeps its own cached template. At most
+    a few records per worker are in flight, so memory does not grow with
+    the input. The records are counted in a first, decode-only pass so
+    progress can be reported against the total. Returns a dict with the
+    written paths, failed records as (record number, error) pairs, elapsed
+    seconds and documents per second.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    written, failed = [], []
+    start = time.perf_counter()
+    total = sum(1 for _ in iter_json_records(source_path)) if progress_callback else 0
+
+    def collect(done):
+        for future in done:
+            record_number = pending.pop(future)
             try:
-                return datetime.strptime(date_str, "%Y-%m-%d")
-            except ValueError:
-                raise ValueError(f"Invalid date format: {date_str}")
+                written.append(future.result())
+            except Exception as e:
+                failed.append((record_number, str(e)))
+        if progress_callback:
+            done_count = len(written) + len(failed)
+            rate = len(written) / max(time.perf_counter() - start, 1e-9)
+            progress_callback(int(100 * done_count / total) if total else 0,
+                              f"Generated {done_count:,} / {total:,} agendas ({rate:.1f} docs/s)...")
 
-def format_dollar_amount(amount):
-    """Format dollar amounts consistently."""
-    if isinstance(amount, str):
-        amount = amount.replace("$", "").replace(",", "")
+    # spawn, not fork: this may run on a Qt worker thread
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = {}
         try:
-            amount = float(amount)
-        except ValueError:
-            raise ValueError(f"Invalid dollar amount: {amount}")
-    return "${:,.0f}".format(amount)
+            for record_number, record in enumerate(iter_records_with_dates(source_path), start=1):
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                pending[pool.submit(render_agenda_file, record, output_dir)] = record_number
+                if len(pending) >= workers * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    seconds = time.perf_counter() - start
+    return {
+        "written": written,
+        "failed": sorted(failed),
+        "seconds": seconds,
+        "docs_per_second": len(written) / seconds if seconds else 0.0,
+    }
+
+def format_batch_summary(result):
+    return (f"Generated {len(result['written'])} agendas in {result['seconds']:.1f}s "
+            f"({result['docs_per_second']:.1f} docs/s), {len(result['failed'])} failed")
+
+def parse_date(date_str):
+    """Parse various date formats to a datetime object.
+
+    See utils.date_formatter.parse_date for the accepted formats.
+    """
+    return date_formatter.parse_date(date_str)
+
+def format_dollar_amount(amount):
+    """Format dollar amounts consistently, e.g. '$1,235'.
+
+    Use utils.money.format_money for whole columns.
+    """
+    return money.format_money([money.parse_amount(amount)]).iloc[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate agendas in bulk from client records.")
+    parser.add_argument("source", help="JSON array or JSON Lines file of client records")
+    parser.add_argument("--out", required=True, help="Folder to write the .docx agendas into")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    result = generate_batch(args.source, args.out, args.workers,
+                            progress_callback=lambda _value, message: print(message, flush=True))
+    for record_number, error in result["failed"]:
+        print(f"Record {record_number} failed: {error}")
+    print(format_batch_summary(result))
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
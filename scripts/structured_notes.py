@@ -1,122 +1,166 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, 
                            QFileDialog, QMessageBox, QGridLayout, QFrame,
-                           QHBoxLayout, QProgressDialog)
+                           QHBoxLayout, QProgressDialog, QCheckBox, QLineEdit)
 from PyQt5.QtCore import Qt
-from openpyxl import load_workbook
-import pandas as pd
-import re
-from datetime import datetime
+import logging
 import os
 from utils.theme import Theme
+from utils.csv_loader import load_account_values
+from utils.parse_cache import cached_call
+from utils.excel_io import find_column, list_sheet_names, patch_workbook, read_sheet_columns
+from utils.cancellation import OperationCancelled
+from utils.progress import StageProgress
+from utils.instrument import Instrumentation, format_spans
+from utils.changes import format_changes
+from utils.backfill import (CASH_COLUMNS, GBIL_COLUMNS, SHEET_COLUMNS, plan_backfill, read_export_index,
+                            run_backfill, update_sheet)
+from utils.config import get_setting
+from utils.file_manager import same_path
+from utils.script_runner import default_runner
+
+logger = logging.getLogger(__name__)
+
+# Sidebar entry, read by utils.script_registry without importing this module
+SCRIPT_META = {
+    "name": "Structured Notes",
+    "description": "Fill GBIL and cash balances into the structured notes allocations workbook.",
+    "order": 20,
+}
+
+# Relative share of the progress bar for each process_files stage
+PROCESS_STAGES = {
+    "load workbook": 20, "read GBIL CSV": 10, "read Cash CSV": 10,
+    "join": 20, "save": 40,
+}
+
+
+def read_allocations(path):
+    """Read the far-right sheet's columns; keys are normalized while matching."""
+    return cached_call(read_sheet_columns, path, SHEET_COLUMNS)
+
+
+def read_gbil(path):
+    return cached_call(load_account_values, path, *GBIL_COLUMNS)
+
+
+def read_cash(path):
+    return cached_call(load_account_values, path, *CASH_COLUMNS)
+
 
 class StructuredNotesProcessor:
     def __init__(self):
         self.original_file = None
         self.gbil_file = None
         self.cash_file = None
+        # All selected exports; several dated ones allow a multi-sheet backfill
+        self.gbil_files = []
+        self.cash_files = []
+        # Sheet names or patterns to update, e.g. "2024-*"; blank for the far-right sheet
+        self.sheets = ""
         self.last_output_path = None
+        self.last_spans = []
+        # Write only cells whose value changed; see utils.changes
+        self.incremental = get_setting("structured_notes", "incremental", False)
+        self.last_changes = None
         
-    def process_files(self, output_path, progress_callback=None):
-        try:
-            if progress_callback:
-                progress_callback(10, "Loading Excel workbook...")
-                
-            # Load the original workbook and far-right worksheet
-            wb = load_workbook(self.original_file)
-            far_right_sheet = wb.sheetnames[-1]
-            ws = wb[far_right_sheet]
+    def process_files(self, output_path, progress_callback=None, cancel_token=None):
+        """Fill the GBIL and Cash columns and save the workbook to output_path.
 
-            # Load the far-right sheet into a DataFrame
-            data = pd.DataFrame(ws.values)
-            header = data.iloc[0]
-            data = data[1:]
-            data.columns = header
-
-            if progress_callback:
-                progress_callback(30, "Processing GBIL data...")
-                
-            # Process GBIL data
-            first_csv = pd.read_csv(self.gbil_file)
-            first_csv['Acct Code'] = (
-                first_csv['Acct Code']
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
+        Account numbers are normalized and matched in chunks of CHUNK_ROWS
+        during the join stage, reporting real row counts and throughput;
+        the cells to write come from utils.backfill's update_sheet. With incremental set, only cells whose value differs
+        from the sheet's are written and the added, changed and missing
+        accounts are kept in last_changes. Cancelling stops at the next
+        chunk and leaves output_path untouched. Each stage is timed as an
+        instrumentation span, shown in the progress dialog and kept in
+        last_spans.
 
-            # Get column names dynamically
-            gbil_available_col = self.get_actual_column_name("GBIL Available", data.columns)
-            cash_in_account_col = self.get_actual_column_name("Cash in Account", data.columns)
-            account_col = self.get_actual_column_name("Account", data.columns)
+        With sheets set, or several GBIL/Cash exports selected, the work
+        goes to process_sheets instead.
+        """
+        if self.sheets.strip() or len(self.gbil_files) > 1 or len(self.cash_files) > 1:
+            return self.process_sheets(output_path, progress_callback, cancel_token)
+        progress = StageProgress(progress_callback, PROCESS_STAGES, cancel_token)
+        instrumentation = Instrumentation.from_config("structured_notes", on_span=progress.report_span)
+        self.last_spans = instrumentation.spans
+        try:
+            with instrumentation.active():
+                with instrumentation.span("load workbook") as stage:
+                    progress.update("load workbook", message="Loading Excel workbook...")
+                    # Stream only the columns we need from the far-right worksheet
+                    sheet = read_allocations(self.original_file)
+                    total = stage.rows = len(sheet.data)
 
-            data[account_col] = (
-                data[account_col]
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
+                with instrumentation.span("read GBIL CSV") as stage:
+                    progress.update("read GBIL CSV", message="Reading GBIL data...")
+                    gbil_index, stage.rows = read_export_index(self.gbil_file, GBIL_COLUMNS, "GBIL CSV")
 
-            # Merge and process data
-            merged_data = data.merge(
-                first_csv[['Acct Code', 'Asset Value']],
-                left_on=account_col,
-                right_on='Acct Code',
-                how='left'
-            )
-            
-            merged_data[gbil_available_col] = merged_data['Asset Value'].fillna("#N/A")
+                with instrumentation.span("read Cash CSV") as stage:
+                    progress.update("read Cash CSV", message="Reading Cash data...")
+                    cash_index, stage.rows = read_export_index(self.cash_file, CASH_COLUMNS, "Cash CSV")
 
-            if progress_callback:
-                progress_callback(60, "Processing Cash data...")
-                
-            # Process Cash data
-            second_csv = pd.read_csv(self.cash_file)
-            second_csv['Account Number'] = (
-                second_csv['Account Number']
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
+                # Normalize and look up the accounts a chunk at a time, then work out the cells
+                with instrumentation.span("join", rows=total):
+                    update = update_sheet(
+                        sheet, gbil_index, cash_index, self.incremental,
+                        progress=progress.rows_callback("join", "Normalizing and matching accounts"))
+                self.last_changes = update.changes
+                if update.changes is not None:
+                    logger.info(format_changes(update.changes, limit=0))
 
-            merged_data = merged_data.merge(
-                second_csv[['Account Number', 'Cash Value']],
-                left_on=account_col,
-                right_on='Account Number',
-                how='left'
-            )
+                if (self.incremental and len(update.cells) == 1
+                        and same_path(output_path, self.original_file)):
+                    # Only the date would change; skip the save altogether
+                    logger.info("No values changed; leaving the workbook untouched")
+                    return True
 
-            merged_data[cash_in_account_col] = merged_data['Cash Value'].fillna("#N/A")
+                # Save workbook; a cancel before the final rename leaves no output
+                with instrumentation.span("save", rows=len(update.cells)):
+                    progress.update("save", 0, len(update.cells), "Saving updated workbook", "cells")
+                    patch_workbook(self.original_file, output_path, {sheet.sheet_name: update.cells},
+                                   number_formats={sheet.sheet_name: update.number_formats},
+                                   progress=progress.rows_callback("save", "Saving updated workbook", "cells"))
 
-            if progress_callback:
-                progress_callback(90, "Saving updated workbook...")
-                
-            # Update worksheet
-            columns_to_update = [gbil_available_col, cash_in_account_col]
-            for col in columns_to_update:
-                col_index = list(header).index(col) + 1
-                for row_idx, value in enumerate(merged_data[col], start=2):
-                    ws.cell(row=row_idx, column=col_index, value=value)
+            logger.info(f"Structured notes: {len(update.cells) - 1:,} cells of {total:,} rows "
+                        f"written to {output_path}")
+            return True
 
-            # Update date
-            ws["L2"].value = datetime.now().strftime("%m/%d/%Y")
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Processing error: {str(e)}")
 
-            # Save workbook
-            wb.save(output_path)
-            
-            if progress_callback:
-                progress_callback(100, "Complete!")
-                
-            return True
+    def process_sheets(self, output_path, progress_callback=None, cancel_token=None):
+        """Backfill the selected sheets in one workbook load and one save.
 
+        Each sheet gets the GBIL and Cash exports dated the same month (see
+        utils.backfill); a blank selection means the far-right sheet.
+        last_changes lists each sheet's columns as '<sheet> <column>'.
+        """
+        instrumentation = Instrumentation.from_config("structured_notes")
+        self.last_spans = instrumentation.spans
+        try:
+            sheet_names = list_sheet_names(self.original_file)
+            jobs = plan_backfill(sheet_names, self.sheets.strip() or [sheet_names[-1]],
+                                 self.gbil_files or [self.gbil_file], self.cash_files or [self.cash_file])
+            with instrumentation.active():
+                updates = run_backfill(self.original_file, output_path, jobs, self.incremental,
+                                       progress_callback=progress_callback, cancel_token=cancel_token)
+        except OperationCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Processing error: {str(e)}")
 
+        self.last_changes = None
+        if self.incremental:
+            self.last_changes = [changes._replace(column=f"{update.sheet_name} {changes.column}")
+                                 for update in updates for changes in update.changes]
+        logger.info(f"Structured notes: {len(updates)} sheet(s) written to {output_path}")
+        return True
+
     @staticmethod
     def get_actual_column_name(expected_name, column_names):
-        for col in column_names:
-            if col and col.strip().lower() == expected_name.strip().lower():
-                return col
-        raise KeyError(f"'{expected_name}' column not found in the worksheet.")
+        return find_column(expected_name, column_names)
 
     def validate_files(self):
         """Validate all input files before processing."""
@@ -125,7 +169,7 @@ class StructuredNotesProcessor:
                 os.path.exists(self.original_file),
                 os.path.exists(self.gbil_file),
                 os.path.exists(self.cash_file)
-            ]):
+            ] + [os.path.exists(path) for path in self.gbil_files + self.cash_files]):
                 raise FileNotFoundError("One or more input files are missing")
             return True
         except Exception as e:
@@ -158,7 +202,7 @@ def load_ui(parent=None):
     )
     description.setAlignment(Qt.AlignCenter)
     description.setFont(Theme.get_body_font())
-    description.setStyleSheet(f"color: {Theme.TEXT_SECONDARY};")
+    description.setObjectName("description")
     
     header_layout.addWidget(title_label)
     header_layout.addWidget(description)
@@ -168,7 +212,7 @@ def load_ui(parent=None):
     separator = QFrame()
     separator.setFrameShape(QFrame.HLine)
     separator.setFrameShadow(QFrame.Sunken)
-    separator.setStyleSheet(f"background-color: {Theme.BORDER};")
+    separator.setObjectName("separator")
     main_layout.addWidget(separator)
     
     # Files Section
@@ -196,11 +240,9 @@ def load_ui(parent=None):
         
         # Button Column
         button = QPushButton(button_text)
-        button.setStyleSheet(Theme.BUTTON_STYLE.format(**Theme.get_style_params()))
+        button.setProperty("variant", "primary")
         section_layout.addWidget(button, stretch=1, alignment=Qt.AlignVCenter)
         
-        section.setStyleSheet(Theme.FILE_SECTION_STYLE.format(**Theme.get_style_params()))
-        
         return section, button, status_label
     
     # Create file sections
@@ -224,12 +266,27 @@ def load_ui(parent=None):
     process_btn = QPushButton("UPDATE")
     process_btn.setEnabled(False)
     process_btn.setMinimumHeight(50)
-    process_btn.setStyleSheet(Theme.BUTTON_STYLE.format(**Theme.get_style_params()))
+    process_btn.setProperty("variant", "primary")
     
     status_label = QLabel("Please upload all required files")
     status_label.setAlignment(Qt.AlignCenter)
-    status_label.setStyleSheet(f"color: {Theme.TEXT_SECONDARY}; font-style: italic;")
+    status_label.setProperty("state", "pending")
+
+    incremental_box = QCheckBox("Only write values that changed")
+    incremental_box.setToolTip(
+        "Compare with the balances already in the workbook and rewrite just the cells that differ.")
+    incremental_box.setChecked(bool(processor.incremental))
+    incremental_box.toggled.connect(lambda checked: setattr(processor, 'incremental', checked))
+
+    sheets_edit = QLineEdit()
+    sheets_edit.setPlaceholderText("Sheets to update: far-right sheet, or e.g. 2024-* to backfill")
+    sheets_edit.setToolTip(
+        "Comma-separated sheet names or patterns. Each sheet is filled from the GBIL and Cash "
+        "exports dated the same month, so select one export of each per month.")
+    sheets_edit.textChanged.connect(lambda text: setattr(processor, 'sheets', text))
     
+    action_layout.addWidget(sheets_edit)
+    action_layout.addWidget(incremental_box)
     action_layout.addWidget(process_btn)
     action_layout.addWidget(status_label)
     main_layout.addWidget(action_frame)
@@ -248,10 +305,41 @@ def load_ui(parent=None):
         process_btn.setEnabled(files_loaded)
         if files_loaded:
             status_label.setText("Ready to process!")
-            status_label.setStyleSheet(f"color: {Theme.SUCCESS}; font-style: normal; font-weight: bold;")
+            Theme.set_property(status_label, "state", "ready")
         else:
             status_label.setText("Please upload all required files")
-            status_label.setStyleSheet(f"color: {Theme.TEXT_SECONDARY}; font-style: italic;")
+            Theme.set_property(status_label, "state", "pending")
+    
+    def validate_in_background(file_path, reader, file_status, label, accept):
+        """Parse the file(s) on the worker pool; the parse also warms the cache.
+
+        file_path may be a list of paths, which are all parsed and accepted
+        together.
+        """
+        paths = file_path if isinstance(file_path, list) else [file_path]
+        name = os.path.basename(paths[0]) if len(paths) == 1 else f"{len(paths)} files"
+        file_status.setText(f"Validating {name}...")
+        Theme.set_property(file_status, "state", None)
+        worker = default_runner().submit(
+            "structured_notes.validate", lambda: [reader(path) for path in paths])
+        
+        def on_valid(_result):
+            accept(file_path)
+            file_status.setText(f"Selected: {name}")
+            Theme.set_property(file_status, "state", "success")
+            update_status()
+        
+        def on_invalid(message, _details):
+            file_status.setText("No file selected")
+            Theme.set_property(file_status, "state", None)
+            QMessageBox.warning(
+                widget,
+                "Invalid File",
+                f"The selected {label} appears to be invalid:\n{message}"
+            )
+        
+        worker.signals.finished.connect(on_valid)
+        worker.signals.error.connect(on_invalid)
     
     def load_excel():
         file_path, _ = QFileDialog.getOpenFileName(
@@ -261,67 +349,38 @@ def load_ui(parent=None):
             "Excel Files (*.xlsx *.xls)"
         )
         if file_path:
-            try:
-                # Validate Excel file
-                wb = load_workbook(file_path, read_only=True)
-                wb.close()
-                
-                processor.original_file = file_path
-                excel_status.setText(f"Selected: {os.path.basename(file_path)}")
-                excel_status.setStyleSheet(f"color: {Theme.SUCCESS};")
-                update_status()
-            except Exception as e:
-                QMessageBox.warning(
-                    widget,
-                    "Invalid File",
-                    f"The selected Excel file appears to be invalid:\n{str(e)}"
-                )
+            validate_in_background(
+                file_path, read_allocations, excel_status, "Excel file",
+                lambda path: setattr(processor, 'original_file', path))
     
+    def set_exports(kind, paths):
+        setattr(processor, f'{kind}_file', paths[0])
+        setattr(processor, f'{kind}_files', paths)
+
     def load_gbil():
-        file_path, _ = QFileDialog.getOpenFileName(
+        # Several dated exports can be picked for a multi-sheet backfill
+        file_paths, _ = QFileDialog.getOpenFileNames(
             widget,
-            "Select GBIL CSV File",
+            "Select GBIL CSV File(s)",
             "",
             "CSV Files (*.csv)"
         )
-        if file_path:
-            try:
-                # Validate CSV file
-                pd.read_csv(file_path, nrows=1)
-                
-                processor.gbil_file = file_path
-                gbil_status.setText(f"Selected: {os.path.basename(file_path)}")
-                gbil_status.setStyleSheet(f"color: {Theme.SUCCESS};")
-                update_status()
-            except Exception as e:
-                QMessageBox.warning(
-                    widget,
-                    "Invalid File",
-                    f"The selected GBIL CSV file appears to be invalid:\n{str(e)}"
-                )
+        if file_paths:
+            validate_in_background(
+                file_paths, read_gbil, gbil_status, "GBIL CSV file",
+                lambda paths: set_exports('gbil', paths))
     
     def load_cash():
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             widget,
-            "Select Cash CSV File",
+            "Select Cash CSV File(s)",
             "",
             "CSV Files (*.csv)"
         )
-        if file_path:
-            try:
-                # Validate CSV file
-                pd.read_csv(file_path, nrows=1)
-                
-                processor.cash_file = file_path
-                cash_status.setText(f"Selected: {os.path.basename(file_path)}")
-                cash_status.setStyleSheet(f"color: {Theme.SUCCESS};")
-                update_status()
-            except Exception as e:
-                QMessageBox.warning(
-                    widget,
-                    "Invalid File",
-                    f"The selected Cash CSV file appears to be invalid:\n{str(e)}"
-                )
+        if file_paths:
+            validate_in_background(
+                file_paths, read_cash, cash_status, "Cash CSV file",
+                lambda paths: set_exports('cash', paths))
     
     def process_files():
         try:
@@ -338,41 +397,65 @@ def load_ui(parent=None):
                 progress = QProgressDialog("Processing files...", "Cancel", 0, 100, widget)
                 progress.setWindowModality(Qt.WindowModal)
                 progress.setWindowTitle("Processing")
-                progress.setAutoClose(True)
-                progress.setAutoReset(True)
+                progress.setAutoClose(False)
+                progress.setAutoReset(False)
                 progress.setMinimumDuration(0)
                 
+                # Run on the worker pool so the dialog stays responsive
+                worker = default_runner().submit(
+                    "structured_notes", processor.process_files, output_path)
+                progress.canceled.connect(worker.cancel)
+                process_btn.setEnabled(False)
+                
                 def update_progress(value, message):
-                    if progress.wasCanceled():
-                        raise Exception("Operation cancelled by user")
                     progress.setValue(value)
                     progress.setLabelText(message)
                 
-                try:
-                    processor.process_files(output_path, progress_callback=update_progress)
+                def finish():
+                    progress.canceled.disconnect()
+                    progress.close()
+                    update_status()
+                
+                def on_finished(_result):
+                    finish()
+                    text = "Files processed successfully!"
+                    details = format_spans(processor.last_spans)
+                    if processor.last_changes is not None:
+                        text += "\n\n" + format_changes(processor.last_changes, limit=0)
+                        details = format_changes(processor.last_changes) + "\n\n" + details
+                    message = QMessageBox(QMessageBox.Information, "Success", text, QMessageBox.Ok, widget)
+                    # Changed accounts and per-stage timings behind "Show Details..."
+                    message.setDetailedText(details)
+                    message.exec_()
+                
+                def on_cancelled():
+                    finish()
                     QMessageBox.information(
                         widget,
-                        "Success",
-                        "Files processed successfully!"
+                        "Cancelled",
+                        "Operation was cancelled by user."
                     )
-                except Exception as e:
-                    raise e
-                finally:
-                    progress.close()
+                
+                def on_error(message, _details):
+                    finish()
+                    QMessageBox.critical(
+                        widget,
+                        "Error",
+                        f"An error occurred while processing the files:\n{message}"
+                    )
+                
+                worker.signals.progress.connect(update_progress)
+                worker.signals.finished.connect(on_finished)
+                worker.signals.cancelled.connect(on_cancelled)
+                worker.signals.error.connect(on_error)
+                progress.show()
                     
         except Exception as e:
-            if str(e) == "Operation cancelled by user":
-                QMessageBox.information(
-                    widget,
-                    "Cancelled",
-                    "Operation was cancelled by user."
-                )
-            else:
-                QMessageBox.critical(
-                    widget,
-                    "Error",
-                    f"An error occurred while processing the files:\n{str(e)}"
-                )
+            QMessageBox.critical(
+                widget,
+                "Error",
+                f"An error occurred while processing the files:\n{str(e)}"
+            )
     
     # Connect buttons to functions
     excel_btn.clicked.connect(load_excel)
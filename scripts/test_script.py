@@ -10,15 +10,7 @@ def load_ui(parent=None):
     layout.addWidget(label)
     
     button = QPushButton("Test Button")
-    button.setStyleSheet(Theme.BUTTON_STYLE.format(
-        primary=Theme.PRIMARY,
-        secondary=Theme.SECONDARY,
-        accent=Theme.ACCENT,
-        disabled=Theme.TEXT_DISABLED,
-        text_disabled=Theme.TEXT_DISABLED,
-        font_family=Theme.FONT_FAMILY,
-        border_radius=Theme.BORDER_RADIUS['small']
-    ))
+    button.setProperty("variant", "primary")
     layout.addWidget(button)
     
     return widget 
\ No newline at end of file
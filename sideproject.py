@@ -1,19 +1,74 @@
+import argparse
+import glob
+import json
 import os
-import pandas as pd
-from openpyxl import load_workbook
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
-import re
+from utils.parse_cache import cached_call
+from utils.file_manager import StagingArea, path_key, same_path
+from utils.excel_io import find_column, list_sheet_names, patch_workbook, read_sheet_columns
+from utils.instrument import Instrumentation, span
+from utils.changes import changes_summary, format_changes
+from utils.backfill import (CASH_COLUMNS, GBIL_COLUMNS, SHEET_COLUMNS, SheetJob, plan_backfill,
+                            read_export_index, run_backfill, update_sheet)
+from utils.log_config import configure_logging, configure_worker_logging, forward_worker_logs
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Default inputs used when the script is run without arguments
+DEFAULT_BASE_FILE = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\Structured Notes Allocations - TEST.xlsx"
+DEFAULT_GBIL_FILE = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\GBIL and Cash - Raw Data CSV\GBILL\Account Search by Ticker and As Of Date (Greater than Zero Assets Only)_HohimerWea.csv"
+DEFAULT_CASH_FILE = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\GBIL and Cash - Raw Data CSV\CASH\Hohimer Wealth - Cash Percentage in Registration_HohimerWea.csv"
+
+
+def load_lookup_indexes(gbil_file, cash_file, stage=None):
+    """Parse the GBIL and Cash exports into (gbil_index, cash_index).
+
+    Exports on a network share are first copied locally side by side;
+    stage=True/False forces staging on or off.
+    """
+    staging = StagingArea(enabled=stage) if stage is not None else StagingArea.for_paths(gbil_file, cash_file)
+    with staging:
+        local = staging.stage_in([gbil_file, cash_file])
+        return _build_indexes(local[gbil_file], local[cash_file])
+
+
+def _build_indexes(gbil_file, cash_file):
+    # Missing columns raise KeyError listing the headers that do exist
+    logger.info("Processing GBIL data...")
+    with span("read GBIL CSV") as stage:
+        gbil_index, stage.rows = read_export_index(gbil_file, GBIL_COLUMNS, "GBIL CSV")
+    logger.info(f"Loaded {stage.rows} GBIL rows")
+
+    logger.info("Processing Cash data...")
+    with span("read Cash CSV") as stage:
+        cash_index, stage.rows = read_export_index(cash_file, CASH_COLUMNS, "Cash CSV")
+    logger.info(f"Loaded {stage.rows} Cash rows")
+    return gbil_index, cash_index
+
+
 class StructuredNotesProcessor:
-    def __init__(self, base_file, gbil_file, cash_file):
+    def __init__(self, base_file, gbil_file, cash_file, output_file=None, stage=None,
+                 trace_path=None, trace_memory=False, incremental=False):
         self.base_file = base_file
         self.gbil_file = gbil_file
         self.cash_file = cash_file
+        # Write back in place unless a separate output is given
+        self.output_file = output_file or base_file
+        # None: stage through local temp storage only for network paths
+        self.stage = stage
+        # Optional Chrome trace JSON of the stage spans, and tracemalloc peaks
+        self.trace_path = trace_path
+        self.trace_memory = trace_memory
+        # Write only cells whose value differs from what the sheet holds
+        self.incremental = incremental
+
+    def staging_area(self):
+        if self.stage is not None:
+            return StagingArea(enabled=self.stage)
+        return StagingArea.for_paths(self.base_file, self.gbil_file, self.cash_file, self.output_file)
 
     def validate_files(self):
         """Validate all input files before processing."""
@@ -31,133 +86,360 @@ class StructuredNotesProcessor:
     @staticmethod
     def get_actual_column_name(expected_name, column_names):
         """Match column names case-insensitively."""
-        for col in column_names:
-            if col and col.strip().lower() == expected_name.strip().lower():
-                return col
-        raise KeyError(f"'{expected_name}' column not found in the worksheet.")
+        return find_column(expected_name, column_names)
+
+    def process(self, indexes=None):
+        """Update the far-right sheet and return a summary dict.
 
-    def process(self):
+        indexes is an optional (gbil_index, cash_index) pair from
+        load_lookup_indexes, so batch runs parse the CSVs only once.
+        """
+        instrumentation = Instrumentation(
+            os.path.basename(self.base_file), trace_memory=self.trace_memory, trace_path=self.trace_path)
         try:
             logger.info("Starting file processing...")
             self.validate_files()
-            
-            # Load base Excel file
-            logger.info("Loading Excel workbook...")
-            wb = load_workbook(self.base_file)
-            far_right_sheet = wb.sheetnames[-1]
-            ws = wb[far_right_sheet]
-            
-            # Load the sheet into DataFrame
-            data = pd.DataFrame(ws.values)
-            header = data.iloc[0]
-            data = data[1:]
-            data.columns = header
-
-            # Get column names dynamically
-            gbil_available_col = self.get_actual_column_name("GBIL Available", data.columns)
-            cash_in_account_col = self.get_actual_column_name("Cash in Account", data.columns)
-            account_col = self.get_actual_column_name("Account", data.columns)
-
-            logger.info("Processing GBIL data...")
-            # Clean account numbers in base data
-            data[account_col] = (
-                data[account_col]
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
-
-            # Process GBIL data
-            logger.info("Processing GBIL data...")
-            gbil_data = pd.read_csv(self.gbil_file)
-            
-            # Debug: Print all column names
-            logger.info(f"Available columns in GBIL file: {gbil_data.columns.tolist()}")
-            
-            gbil_data['Acct Code'] = (
-                gbil_data['Acct Code']
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
-
-            # Merge GBIL data
-            try:
-                merged_data = data.merge(
-                    gbil_data[['Acct Code', 'Asset Value']],
-                    left_on=account_col,
-                    right_on='Acct Code',
-                    how='left'
-                )
-                logger.info(f"Columns after merge: {merged_data.columns.tolist()}")
-                
-                # Use Asset Value_x which is what pandas renamed it to
-                merged_data[gbil_available_col] = merged_data['Asset Value_x'].fillna("#N/A")
-                
-            except KeyError as e:
-                logger.error(f"Column error during merge. Available columns: {gbil_data.columns.tolist()}")
-                raise
-            except IndexError:
-                logger.error(f"Asset Value column not found after merge. Available columns: {merged_data.columns.tolist()}")
-                raise Exception("Asset Value column not found after merge")
-
-            logger.info("Processing Cash data...")
-            # Process Cash data
-            logger.info("Processing Cash data...")
-            cash_data = pd.read_csv(self.cash_file)
-            logger.info(f"Cash CSV columns: {cash_data.columns.tolist()}")
-            
-            cash_data['Account Number'] = (
-                cash_data['Account Number']
-                .astype(str)
-                .apply(lambda x: re.sub(r'\D', '', x))
-                .str.lstrip('0')
-            )
-
-            # Merge Cash data
-            merged_data = merged_data.merge(
-                cash_data[['Account Number', 'Cash Value']],
-                left_on=account_col,
-                right_on='Account Number',
-                how='left'
-            )
-            logger.info(f"Columns after cash merge: {merged_data.columns.tolist()}")
-
-            # Use the renamed column after merge
-            merged_data[cash_in_account_col] = merged_data['Cash Value_x'].fillna("#N/A")
-
-            logger.info("Updating worksheet...")
-            # Update worksheet
-            columns_to_update = [gbil_available_col, cash_in_account_col]
-            for col in columns_to_update:
-                col_index = list(header).index(col) + 1
-                for row_idx, value in enumerate(merged_data[col], start=2):
-                    ws.cell(row=row_idx, column=col_index, value=value)
-
-            # Update date
-            ws["L2"].value = datetime.now().strftime("%m/%d/%Y")
-
-            # Save workbook
-            logger.info("Saving workbook...")
-            wb.save(self.base_file)
-            logger.info("Processing completed successfully.")
+
+            with instrumentation.active(), self.staging_area() as staging:
+                # Copy inputs off the share concurrently and work on local copies
+                inputs = [self.base_file] if indexes else [self.base_file, self.gbil_file, self.cash_file]
+                with span("stage inputs"):
+                    local = staging.stage_in(inputs)
+                base_file = local[self.base_file]
+
+                # Stream only the columns we need from the far-right worksheet
+                logger.info("Loading Excel workbook...")
+                with span("load workbook") as stage:
+                    sheet = cached_call(read_sheet_columns, base_file, SHEET_COLUMNS)
+                    stage.rows = len(sheet.data)
+
+                gbil_index, cash_index = indexes or _build_indexes(
+                    local[self.gbil_file], local[self.cash_file])
+                # Normalize, match and work out the cells to write
+                with span("join", rows=len(sheet.data)):
+                    update = update_sheet(sheet, gbil_index, cash_index, self.incremental)
+                if update.changes is not None:
+                    logger.info(format_changes(update.changes, limit=0))
+
+                summary = {
+                    'rows': update.rows,
+                    'gbil_matched': update.gbil_matched,
+                    'cash_matched': update.cash_matched,
+                    'cells_written': len(update.cells) - 1,
+                }
+                if update.changes is not None:
+                    summary['changes'] = changes_summary(update.changes)
+
+                if self.incremental and len(update.cells) == 1 and same_path(self.output_file, self.base_file):
+                    # Nothing but the date would change: skip the save and the copy back
+                    logger.info("No values changed; leaving the workbook untouched.")
+                    summary['cells_written'] = 0
+                else:
+                    # Save locally, then replace the real output in one rename
+                    logger.info("Saving workbook...")
+                    with span("save", rows=len(update.cells)):
+                        local_output = staging.local_path_for(self.output_file)
+                        patch_workbook(base_file, local_output, {sheet.sheet_name: update.cells},
+                                       number_formats={sheet.sheet_name: update.number_formats})
+                        staging.publish(local_output, self.output_file)
+                logger.info("Processing completed successfully.")
+
+                summary['copy_seconds'] = round(staging.total_seconds(), 3)
+                summary['stages'] = instrumentation.stage_seconds()
+                return summary
 
         except Exception as e:
             logger.error(f"Processing failed: {e}")
             raise
 
-if __name__ == "__main__":
+def backfill_workbook(base_file, sheets, gbil_files, cash_files, output_file=None, stage=None,
+                      trace_path=None, trace_memory=False, incremental=False, workers=None):
+    """Update several dated sheets of one workbook with one load and one save.
+
+    sheets is a list or comma-separated string of sheet names or patterns
+    ('2024-*'); each selected sheet is filled from the GBIL and Cash
+    exports whose file names carry the same month (see utils.backfill).
+    Returns a summary dict with one entry per sheet under 'sheets'.
+    """
+    output_file = output_file or base_file
+    instrumentation = Instrumentation(
+        os.path.basename(base_file), trace_memory=trace_memory, trace_path=trace_path)
+    staging = (StagingArea(enabled=stage) if stage is not None
+               else StagingArea.for_paths(base_file, output_file, *gbil_files, *cash_files))
+    with instrumentation.active(), staging:
+        jobs = plan_backfill(list_sheet_names(base_file), sheets, gbil_files, cash_files)
+        for job in jobs:
+            logger.info(f"{job.sheet_name}: {os.path.basename(job.gbil_file)}, {os.path.basename(job.cash_file)}")
+
+        with span("stage inputs"):
+            local = staging.stage_in(
+                [base_file] + [job.gbil_file for job in jobs] + [job.cash_file for job in jobs])
+        local_jobs = [SheetJob(job.sheet_name, local[job.gbil_file], local[job.cash_file]) for job in jobs]
+        # In place: patch the local copy itself, so an unchanged run is detected
+        in_place = same_path(output_file, base_file)
+        local_output = local[base_file] if in_place else staging.local_path_for(output_file)
+
+        updates = run_backfill(local[base_file], local_output, local_jobs, incremental, workers)
+        cells_written = sum(len(update.cells) - 1 for update in updates)
+        if not (incremental and in_place and not cells_written):
+            staging.publish(local_output, output_file)
+
+        summary = {'sheets': {}, 'cells_written': cells_written}
+        for update in updates:
+            sheet_summary = {
+                'rows': update.rows,
+                'gbil_matched': update.gbil_matched,
+                'cash_matched': update.cash_matched,
+                'cells_written': len(update.cells) - 1,
+            }
+            if update.changes is not None:
+                sheet_summary['changes'] = changes_summary(update.changes)
+            summary['sheets'][update.sheet_name] = sheet_summary
+        summary['copy_seconds'] = round(staging.total_seconds(), 3)
+    summary['stages'] = instrumentation.stage_seconds()
+    return summary
+
+
+# --- Batch command line -----------------------------------------------------
+
+_worker_indexes = None
+
+
+def _init_worker(indexes, log_queue, root_level, log_level):
+    global _worker_indexes
+    _worker_indexes = indexes
+    # Log through the parent; only it writes the log files
+    configure_worker_logging(log_queue, root_level)
+    logger.setLevel(log_level)
+
+
+def mirrored_paths(workbooks, directory, suffix=None):
+    """Map each workbook to a path inside directory, or to itself without one.
+
+    Each workbook keeps its folder relative to the folder all of them
+    share, so same-named workbooks from different folders do not land on
+    the same file. suffix replaces the extension, e.g. '.trace.json'.
+    """
+    if not directory:
+        return {base_file: None if suffix else base_file for base_file in workbooks}
+    absolute = {base_file: os.path.abspath(base_file) for base_file in workbooks}
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in absolute.values()])
+    except ValueError:
+        # Different drives share no folder; duplicate names are caught later
+        root = None
+    paths = {}
+    for base_file, path in absolute.items():
+        relative = os.path.relpath(path, root) if root else os.path.basename(path)
+        if suffix:
+            relative = os.path.splitext(relative)[0] + suffix
+        paths[base_file] = os.path.join(directory, relative)
+    return paths
+
+
+def duplicate_targets(*path_maps):
+    """Workbooks whose output or trace path is shared with another workbook.
+
+    Returns {workbook: error message}; those workbooks are reported as
+    failures instead of overwriting each other's results.
+    """
+    owners = {}
+    for paths in path_maps:
+        for base_file, path in paths.items():
+            if path:
+                owners.setdefault(path_key(path), []).append(base_file)
+    errors = {}
+    for path, base_files in owners.items():
+        if len(base_files) > 1:
+            for base_file in base_files:
+                others = ", ".join(other for other in base_files if other != base_file)
+                errors[base_file] = f"{path} would also be written for {others}"
+    return errors
+
+
+def _make_parent_dirs(*paths):
+    for path in paths:
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+def _failed_result(base_file, output_file, error):
+    """Result for a workbook refused before it ran, so it has no timing."""
+    print(f"{'':10} {base_file}: FAILED: {error}", flush=True)
+    return {'file': base_file, 'output': output_file, 'ok': False, 'error': error, 'seconds': None}
+
+
+def _process_workbook(base_file, output_file, gbil_file, cash_file, stage, trace_path=None, trace_memory=False,
+                      incremental=False):
+    """Process one workbook in a pool worker and report the outcome."""
+    start = time.perf_counter()
+    result = {'file': base_file, 'output': output_file}
+    try:
+        processor = StructuredNotesProcessor(
+            base_file, gbil_file, cash_file, output_file, stage,
+            trace_path=trace_path, trace_memory=trace_memory, incremental=incremental)
+        result.update(processor.process(indexes=_worker_indexes))
+        result['ok'] = True
+    except Exception as e:
+        result.update(ok=False, error=str(e))
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def expand_workbooks(patterns, manifest=None):
+    """Resolve glob patterns and manifest lines into a sorted list of workbooks.
+
+    The manifest is a text file with one path or glob per line; blank lines
+    and lines starting with # are ignored. Patterns that match nothing are
+    kept as-is so they are reported as failures rather than skipped. A
+    workbook reached through two spellings of its path is listed once.
+    """
+    patterns = list(patterns)
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            patterns += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    workbooks = []
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        workbooks.extend(matches if matches else [pattern])
+    unique = {}
+    for workbook in sorted(workbooks, key=lambda path: (len(path), path)):
+        unique.setdefault(path_key(workbook), workbook)
+    return sorted(unique.values())
+
+
+def run_batch(workbooks, gbil_file, cash_file, output_dir=None, workers=None, stage=None,
+              trace_dir=None, trace_memory=False, incremental=False):
+    """Update many workbooks against one GBIL/Cash pair using a process pool.
+
+    The CSVs are parsed once here and shipped to each worker once, via the
+    pool initializer. With trace_dir, each workbook's stage spans are saved
+    there as <workbook>.trace.json. Output and trace files mirror each
+    workbook's folder (see mirrored_paths); workbooks that would still
+    share a target fail instead of overwriting each other. With
+    incremental, only cells whose value changed are written. Returns one
+    result dict per workbook.
+    """
+    outputs = mirrored_paths(workbooks, output_dir)
+    traces = mirrored_paths(workbooks, trace_dir, ".trace.json")
+    duplicates = duplicate_targets(outputs, traces)
+    indexes = load_lookup_indexes(gbil_file, cash_file, stage)
+
+    results = [_failed_result(base_file, outputs[base_file], error) for base_file, error in duplicates.items()]
+    with forward_worker_logs() as log_queue, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(indexes, log_queue, logging.getLogger().level, logger.level)) as pool:
+        futures = []
+        for base_file in workbooks:
+            if base_file in duplicates:
+                continue
+            _make_parent_dirs(output_dir and outputs[base_file], traces[base_file])
+            futures.append(pool.submit(
+                _process_workbook, base_file, outputs[base_file], gbil_file, cash_file, stage, traces[base_file],
+                trace_memory, incremental))
+        for future in as_completed(futures):
+            result = future.result()
+            status = "ok" if result['ok'] else f"FAILED: {result['error']}"
+            print(f"[{result['seconds']:>7.2f}s] {result['file']}: {status}", flush=True)
+            results.append(result)
+    return sorted(results, key=lambda r: r['file'])
+
+
+def expand_exports(pattern):
+    """Export CSVs matching a path or glob, sorted; kept as-is if none match."""
+    return sorted(glob.glob(pattern)) or [pattern]
+
+
+def run_backfills(workbooks, sheets, gbil_pattern, cash_pattern, output_dir=None, workers=None, stage=None,
+                  trace_dir=None, trace_memory=False, incremental=False):
+    """Backfill the selected sheets of each workbook in turn; one result dict per workbook.
+
+    Output and trace paths are laid out as in run_batch.
+    """
+    gbil_files, cash_files = expand_exports(gbil_pattern), expand_exports(cash_pattern)
+    outputs = mirrored_paths(workbooks, output_dir)
+    traces = mirrored_paths(workbooks, trace_dir, ".trace.json")
+    duplicates = duplicate_targets(outputs, traces)
+
+    results = []
+    for base_file in workbooks:
+        output_file = outputs[base_file]
+        if base_file in duplicates:
+            results.append(_failed_result(base_file, output_file, duplicates[base_file]))
+            continue
+        start = time.perf_counter()
+        result = {'file': base_file, 'output': output_file}
+        _make_parent_dirs(output_dir and output_file, traces[base_file])
+        try:
+            result.update(backfill_workbook(
+                base_file, sheets, gbil_files, cash_files, output_file, stage,
+                trace_path=traces[base_file], trace_memory=trace_memory,
+                incremental=incremental, workers=workers))
+            result['ok'] = True
+        except Exception as e:
+            logger.error(f"Backfill of {base_file} failed: {e}")
+            result.update(ok=False, error=str(e))
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        status = f"ok, {len(result['sheets'])} sheet(s)" if result['ok'] else f"FAILED: {result['error']}"
+        print(f"[{result['seconds']:>7.2f}s] {base_file}: {status}", flush=True)
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    # Configure logging from config/logging_config.json; pool workers log through this process
+    configure_logging()
+    parser = argparse.ArgumentParser(
+        description="Refresh GBIL Available / Cash in Account on structured notes allocation workbooks.")
+    parser.add_argument("workbooks", nargs="*", help="Workbook paths or glob patterns")
+    parser.add_argument("--manifest", help="Text file listing workbook paths or globs, one per line")
+    parser.add_argument("--gbil", default=DEFAULT_GBIL_FILE,
+                        help="GBIL export CSV shared by all workbooks; with --sheets, a glob of dated exports")
+    parser.add_argument("--cash", default=DEFAULT_CASH_FILE,
+                        help="Cash export CSV shared by all workbooks; with --sheets, a glob of dated exports")
+    parser.add_argument("--sheets",
+                        help="Backfill these sheets instead of the far-right one: comma-separated names or "
+                             "patterns such as '2024-*'. Each sheet is filled from the --gbil/--cash exports "
+                             "dated the same month, with one load and one save per workbook")
+    parser.add_argument("--output-dir", help="Write updated copies here instead of updating in place")
+    parser.add_argument("--workers", type=int,
+                        help="Worker processes, or threads per workbook with --sheets (default: CPU count)")
+    parser.add_argument("--stage", dest="stage", action="store_true", default=None,
+                        help="Always work on local copies (default: only for network paths)")
+    parser.add_argument("--no-stage", dest="stage", action="store_false",
+                        help="Never stage, read and write files where they are")
+    parser.add_argument("--json", dest="json_path", help="Also write per-file results to this JSON file")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite cells whose GBIL/Cash value changed; report added, changed "
+                             "and missing accounts (in --json output)")
+    parser.add_argument("--trace", dest="trace_dir",
+                        help="Write a Chrome trace JSON of each workbook's stages into this folder")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record peak Python allocations per stage with tracemalloc (slower)")
+    args = parser.parse_args(argv)
+
+    workbooks = expand_workbooks(args.workbooks, args.manifest)
+    if not workbooks:
+        workbooks = [DEFAULT_BASE_FILE]
+
     try:
-        # Define file paths
-        base_file = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\Structured Notes Allocations - TEST.xlsx"
-        gbil_file = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\GBIL and Cash - Raw Data CSV\GBILL\Account Search by Ticker and As Of Date (Greater than Zero Assets Only)_HohimerWea.csv"
-        cash_file = r"\\HWM29-LT\Users\ErikKnudsen\Hohimer Wealth Management\Investment Team - Alternative Investments\GBIL and Cash - Raw Data CSV\CASH\Hohimer Wealth - Cash Percentage in Registration_HohimerWea.csv"
-
-        # Initialize and run processor
-        processor = StructuredNotesProcessor(base_file, gbil_file, cash_file)
-        processor.process()
-        print("Processing completed successfully!")
-        
+        if args.sheets:
+            results = run_backfills(workbooks, args.sheets, args.gbil, args.cash, args.output_dir, args.workers,
+                                    args.stage, args.trace_dir, args.trace_memory, args.incremental)
+        else:
+            results = run_batch(workbooks, args.gbil, args.cash, args.output_dir, args.workers, args.stage,
+                                args.trace_dir, args.trace_memory, args.incremental)
     except Exception as e:
         print(f"Error: {e}")
         logger.error(f"Main execution failed: {e}", exc_info=True)
+        return 2
+
+    failed = [r for r in results if not r['ok']]
+    print(f"Processed {len(results) - len(failed)}/{len(results)} workbook(s) successfully.")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
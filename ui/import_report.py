@@ -0,0 +1,68 @@
+import os
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton
+from PyQt5.QtGui import QFont
+from utils.lazy_import import HEAVY_MODULES, format_import_report, measure_cold_imports
+from utils.script_registry import default_registry
+from utils.script_runner import default_runner
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ImportReportDialog(QDialog):
+    """Shows where import time goes, to catch startup regressions.
+
+    Lists the imports this session has paid for (lazy loads and prewarm)
+    and, on request, a -X importtime breakdown of importing every script
+    in a fresh interpreter.
+    """
+
+    def __init__(self, parent=None, startup_seconds=None):
+        super().__init__(parent)
+        self.startup_seconds = startup_seconds
+        self.setWindowTitle("Import Time Report")
+        self.resize(760, 560)
+
+        layout = QVBoxLayout(self)
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setFont(QFont("Courier", 9))
+        layout.addWidget(self.report)
+
+        buttons = QHBoxLayout()
+        self.measure_button = QPushButton("Measure Cold Imports")
+        self.measure_button.clicked.connect(self.measure)
+        buttons.addWidget(self.measure_button)
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(lambda: self.show_report())
+        buttons.addWidget(refresh_button)
+        buttons.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.show_report()
+
+    def show_report(self, cold_entries=None):
+        header = []
+        if self.startup_seconds is not None:
+            header = [f"Window shown {self.startup_seconds * 1000:.0f} ms after launch", ""]
+        self.report.setPlainText("\n".join(header) + format_import_report(cold_entries))
+
+    def measure(self):
+        modules = [f"scripts.{info.module}" for info in default_registry().scan()]
+        self.measure_button.setEnabled(False)
+        self.report.appendPlainText("\nMeasuring cold imports...")
+        worker = default_runner().submit(
+            "import_report", measure_cold_imports, modules + list(HEAVY_MODULES), cwd=PROJECT_ROOT)
+
+        def on_finished(entries):
+            self.measure_button.setEnabled(True)
+            self.show_report(entries)
+
+        def on_error(message, _details):
+            self.measure_button.setEnabled(True)
+            self.report.appendPlainText(f"Measurement failed: {message}")
+
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(on_error)
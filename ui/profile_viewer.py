@@ -0,0 +1,92 @@
+import os
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
+                             QPlainTextEdit, QPushButton, QComboBox, QLabel, QSplitter)
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtGui import QFont, QDesktopServices
+from utils.profiler import format_hot_functions, list_runs, profile_dir, top_functions, top_stacks
+
+SORT_KEYS = {"Own time": "tottime", "Cumulative time": "cumtime", "Calls": "calls"}
+
+
+class ProfileViewerDialog(QDialog):
+    """Lists saved profiling runs and the hottest functions of each.
+
+    The .pstats and .collapsed files themselves are in the profiles
+    folder, for snakeviz, speedscope or flamegraph.pl.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Profiler Runs")
+        self.resize(980, 600)
+
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Horizontal)
+        self.run_list = QListWidget()
+        self.run_list.currentItemChanged.connect(lambda *_: self.show_run())
+        splitter.addWidget(self.run_list)
+
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.report.setFont(QFont("Courier", 9))
+        splitter.addWidget(self.report)
+        splitter.setSizes([260, 720])
+        layout.addWidget(splitter)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(QLabel("Sort by:"))
+        self.sort_box = QComboBox()
+        self.sort_box.addItems(SORT_KEYS)
+        self.sort_box.currentIndexChanged.connect(lambda _index: self.show_run())
+        buttons.addWidget(self.sort_box)
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        buttons.addWidget(refresh_button)
+        folder_button = QPushButton("Open Folder")
+        folder_button.clicked.connect(
+            lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(profile_dir())))
+        buttons.addWidget(folder_button)
+        buttons.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        self.run_list.clear()
+        for run in list_runs():
+            item = QListWidgetItem(f"{run.started:%Y-%m-%d %H:%M:%S}  {run.name}")
+            item.setData(Qt.UserRole, run)
+            self.run_list.addItem(item)
+        if self.run_list.count():
+            self.run_list.setCurrentRow(0)
+        else:
+            self.report.setPlainText(
+                "No profiling runs yet. Turn on Tools > Profile Scripts (or set ELKRUN_PROFILE=1) "
+                "and run a script.")
+
+    def show_run(self):
+        item = self.run_list.currentItem()
+        if item is None:
+            return
+        run = item.data(Qt.UserRole)
+        sections = []
+        try:
+            if run.stats_path:
+                sort = SORT_KEYS[self.sort_box.currentText()]
+                sections.append(f"Hot functions (cProfile, by {sort})\n"
+                                + format_hot_functions(top_functions(run.stats_path, sort)))
+            stacks = top_stacks(run.collapsed_path, limit=None)
+            if stacks:
+                total = sum(count for count, _stack in stacks)
+                lines = [f"{count:>7} {count / total:>6.1%}  {stack.split(';')[-1]}  <- "
+                         + " <- ".join(reversed(stack.split(';')[-4:-1])) for count, stack in stacks[:10]]
+                sections.append("Most sampled stacks (innermost first)\n" + "\n".join(lines))
+        except (OSError, ValueError, EOFError) as e:
+            sections.append(f"Could not read this run: {e}")
+        files = [os.path.basename(path) for path in (run.stats_path, run.collapsed_path) if path]
+        sections.append("Files: " + ", ".join(files))
+        self.report.setPlainText("\n\n".join(sections))
@@ -1,15 +1,45 @@
+from collections import OrderedDict
 import importlib
+import logging
+import sys
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QMessageBox, 
-                           QFrame, QScrollArea)
+                           QFrame, QScrollArea, QStackedWidget)
 from PyQt5.QtCore import Qt, pyqtSignal
 from utils.theme import Theme
+from utils.config import get_setting
+from utils.script_runner import default_runner
+from utils import profiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PANELS = 6
 
 class ScriptLoader(QWidget):
+    """Hosts script panels, keeping recently used ones alive.
+
+    Each script's load_ui() runs once; switching back to a script shows
+    the same panel with its state intact. At most max_panels panels are
+    kept, and the least recently shown one is evicted beyond that. Before
+    a panel is deleted its module's optional unload_ui(panel) is called;
+    returning False keeps the panel. Panels whose script still has jobs on
+    the script runner (named '<script>' or '<script>.<task>') are kept too.
+
+    With profiling enabled, building a panel is profiled as
+    '<script>-load_ui', and the GUI thread is sampled while a script's
+    panel is shown, covering the panel's UI callbacks; that run is saved
+    as '<script>-ui' when another script is shown. The -ui run samples
+    only, leaving cProfile free for the script's jobs.
+    """
     script_executed = pyqtSignal(str)
+    panel_evicted = pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_panels=None):
         super().__init__(parent)
         self.setObjectName("script_loader")
+        self.max_panels = max_panels or get_setting("ui", "max_cached_panels", DEFAULT_MAX_PANELS)
+        # Script name -> panel, least recently shown first
+        self.panels = OrderedDict()
+        self.ui_profile = None
         self.initUI()
 
     def initUI(self):
@@ -29,42 +59,117 @@ class ScriptLoader(QWidget):
         self.content_frame.setFrameShape(QFrame.StyledPanel)
         self.content_frame.setFrameShadow(QFrame.Raised)
         content_layout = QVBoxLayout(self.content_frame)
+        self.stack = QStackedWidget()
+        content_layout.addWidget(self.stack)
         content_layout.addStretch()
         layout.addWidget(self.content_frame)
-        
-        # Apply theme
-        self.setStyleSheet(Theme.SCRIPT_LOADER_STYLE.format(**Theme.get_style_params()))
+
+        self.error_label = QLabel()
+        self.error_label.setObjectName("error")
+        self.error_label.setWordWrap(True)
+        self.error_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.stack.addWidget(self.error_label)
 
     def load_script(self, script_name):
-        # Clear previous content
-        self.clear_content()
-        
-        try:
-            # Load the script module
-            script_module = __import__(f"scripts.{script_name}", fromlist=['load_ui'])
-            
-            # Call the load_ui function from the script module
-            script_ui = script_module.load_ui(self.content_frame)
-            
-            # Add the script UI to the content frame
-            self.content_frame.layout().insertWidget(0, script_ui)
-        except Exception as e:
-            self.show_error(f"Error loading script: {e}")
+        self.start_ui_profile(script_name)
+        panel = self.panels.get(script_name)
+        if panel is None:
+            try:
+                # Load the script module and build its UI
+                script_module = importlib.import_module(f"scripts.{script_name}")
+                with profiler.profile(f"{script_name}-load_ui"):
+                    panel = script_module.load_ui(self.stack)
+            except Exception as e:
+                self.show_error(f"Error loading script: {e}")
+                return
+            self.stack.addWidget(panel)
+            self.panels[script_name] = panel
+            self.evict_over_limit(keep=script_name)
+
+        self.panels.move_to_end(script_name)
+        self.stack.setCurrentWidget(panel)
+
+    def current_script(self):
+        """Name of the script whose panel is shown, or None."""
+        current = self.stack.currentWidget()
+        return next((name for name, panel in self.panels.items() if panel is current), None)
+
+    def start_ui_profile(self, script_name):
+        """Sample the GUI thread for script_name, ending any previous run."""
+        self.stop_ui_profile()
+        if profiler.is_enabled():
+            self.ui_profile = profiler.ProfileSession(f"{script_name}-ui", deterministic=False)
+            self.ui_profile.start()
+
+    def stop_ui_profile(self):
+        if self.ui_profile is not None:
+            self.ui_profile.stop()
+            self.ui_profile = None
+
+    def reload_script(self, script_name):
+        """Rebuild a cached panel after its module was reloaded.
+
+        A panel with running jobs is left alone; it picks up the new code
+        the next time it is rebuilt.
+        """
+        panel = self.panels.get(script_name)
+        if panel is None:
+            return
+        if self.has_running_jobs(script_name):
+            logger.info(f"{script_name} has running jobs; keeping its current panel")
+            return
+        was_current = self.stack.currentWidget() is panel
+        self.evict(script_name, force=True)
+        if was_current:
+            self.load_script(script_name)
+
+    def evict(self, script_name, force=False):
+        """Delete a cached panel. Returns False if unload_ui kept it."""
+        panel = self.panels.get(script_name)
+        if panel is None:
+            return True
+        if not force and self.has_running_jobs(script_name):
+            return False
+        unload_ui = getattr(sys.modules.get(f"scripts.{script_name}"), "unload_ui", None)
+        if unload_ui is not None:
+            try:
+                keep = unload_ui(panel) is False
+            except Exception as e:
+                logger.warning(f"unload_ui failed for {script_name}: {e}")
+                keep = False
+            if keep and not force:
+                return False
+
+        del self.panels[script_name]
+        self.stack.removeWidget(panel)
+        panel.deleteLater()
+        self.panel_evicted.emit(script_name)
+        return True
+
+    @staticmethod
+    def has_running_jobs(script_name):
+        return any(
+            name == script_name or name.startswith(f"{script_name}.")
+            for name in default_runner().active_jobs().values()
+        )
+
+    def evict_over_limit(self, keep=None):
+        """Evict least recently shown panels until at most max_panels remain."""
+        for script_name in list(self.panels):
+            if len(self.panels) <= self.max_panels:
+                break
+            if script_name != keep:
+                self.evict(script_name)
 
     def clear_content(self):
-        """Remove all widgets from the content frame."""
-        layout = self.content_frame.layout()
-        while layout.count() > 1:  # Keep the stretcher
-            widget = layout.takeAt(0).widget()
-            if widget:
-                widget.deleteLater()
+        """Evict every cached panel that its script allows to be dropped."""
+        for script_name in list(self.panels):
+            self.evict(script_name)
 
     def show_error(self, message):
         """Display error message in the content area."""
-        error_label = QLabel(message)
-        error_label.setStyleSheet(f"color: {Theme.ERROR};")
-        error_label.setWordWrap(True)
-        self.content_frame.layout().insertWidget(0, error_label)
+        self.error_label.setText(message)
+        self.stack.setCurrentWidget(self.error_label)
         
     def execute_script(self, script_name):
         """Emit the script_executed signal with the script name."""
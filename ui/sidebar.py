@@ -1,16 +1,17 @@
-import os
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QLabel, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QLabel,
                            QFrame, QScrollArea)
 from PyQt5.QtCore import pyqtSignal, Qt
 from utils.theme import Theme
+from utils.script_registry import ScriptRegistry, default_registry, sort_key
 
 class Sidebar(QWidget):
     script_selected = pyqtSignal(str)
 
-    def __init__(self, parent=None, scripts_dir="scripts"):
+    def __init__(self, parent=None, scripts_dir=None):
         super().__init__(parent)
-        self.scripts_dir = scripts_dir
-        self.setObjectName("sidebar")  # For styling
+        self.registry = ScriptRegistry(scripts_dir) if scripts_dir else default_registry()
+        self.scripts_dir = self.registry.scripts_dir
+        self.setObjectName("sidebar")  # Styled by the app stylesheet
         self.initUI()
 
     def initUI(self):
@@ -47,32 +48,62 @@ class Sidebar(QWidget):
         # Load scripts and apply styling
         self.load_scripts()
         self.script_list.itemClicked.connect(self.on_script_selected)
-        
-        # Apply theme
-        self.setStyleSheet(Theme.SIDEBAR_STYLE.format(**Theme.get_style_params()))
 
     def load_scripts(self):
-        """Load available scripts from the scripts directory."""
+        """Load available scripts from the script registry."""
         try:
-            script_files = [
-                f[:-3] for f in os.listdir(self.scripts_dir)
-                if f.endswith('.py') and f != '__init__.py'
-            ]
-            
-            # Sort scripts alphabetically
-            script_files.sort()
-            
-            # Add each script as a list item with proper formatting
-            for script_name in script_files:
-                # Convert snake_case to Title Case for display
-                display_name = " ".join(word.capitalize() for word in script_name.split('_'))
-                self.script_list.addItem(display_name)
-                
+            for info in self.registry.scan():
+                self.script_list.addItem(self._make_item(info))
+
         except OSError as e:
             print(f"Error loading scripts: {e}")
 
+    @staticmethod
+    def _make_item(info):
+        item = QListWidgetItem(info.name)
+        # Keep the real module name; display names need not round-trip
+        item.setData(Qt.UserRole, info.module)
+        item.setData(Qt.UserRole + 1, info)
+        if info.description:
+            item.setToolTip(info.description)
+        return item
+
+    def _find_row(self, module):
+        for row in range(self.script_list.count()):
+            if self.script_list.item(row).data(Qt.UserRole) == module:
+                return row
+        return -1
+
+    def add_script(self, info):
+        """Insert one script at its sorted position."""
+        if self._find_row(info.module) >= 0:
+            self.update_script(info)
+            return
+        row = 0
+        while row < self.script_list.count() and \
+                sort_key(self.script_list.item(row).data(Qt.UserRole + 1)) <= sort_key(info):
+            row += 1
+        self.script_list.insertItem(row, self._make_item(info))
+
+    def remove_script(self, module):
+        row = self._find_row(module)
+        if row >= 0:
+            self.script_list.takeItem(row)
+
+    def update_script(self, info):
+        """Refresh one script's entry, moving it if its sort position changed."""
+        row = self._find_row(info.module)
+        if row < 0:
+            self.add_script(info)
+            return
+        if self.script_list.item(row).data(Qt.UserRole + 1) == info:
+            return
+        selected = self.script_list.currentRow() == row
+        self.script_list.takeItem(row)
+        self.add_script(info)
+        if selected:
+            self.script_list.setCurrentRow(self._find_row(info.module))
+
     def on_script_selected(self, item):
         """Emit signal when a script is selected."""
-        # Convert display name back to script name
-        script_name = "_".join(item.text().lower().split())
-        self.script_selected.emit(script_name)
+        self.script_selected.emit(item.data(Qt.UserRole))
@@ -0,0 +1,290 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import calendar
+import fnmatch
+import logging
+import os
+import re
+from datetime import datetime
+from utils.normalize import normalize_account_numbers
+from utils.csv_loader import load_account_values
+from utils.parse_cache import cached_call
+from utils.lookup import build_lookup_index, lookup_values
+from utils.money import EXCEL_MONEY_FORMAT
+from utils.excel_io import column_updates, patch_workbook, read_sheets_columns
+from utils.changes import MISSING_VALUE, cell_updates, diff_column, format_changes
+from utils.progress import StageProgress, iter_chunks
+from utils.instrument import span
+from utils.file_manager import same_path
+from utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# The allocation sheet columns and export columns every update path uses
+SHEET_COLUMNS = ["Account", "GBIL Available", "Cash in Account"]
+GBIL_COLUMNS = ("Acct Code", "Asset Value")
+CASH_COLUMNS = ("Account Number", "Cash Value")
+DATE_CELL = "L2"
+# Relative share of the progress bar for each run_backfill stage
+BACKFILL_STAGES = {"load workbook": 25, "read exports": 15, "join": 15, "save": 45}
+
+SheetJob = namedtuple('SheetJob', ['sheet_name', 'gbil_file', 'cash_file'])
+SheetJob.__doc__ = """One sheet of a backfill and the exports that fill it.
+
+sheet_name -- worksheet to update
+gbil_file  -- GBIL export CSV for the sheet's month
+cash_file  -- Cash export CSV for the sheet's month
+"""
+
+SheetUpdate = namedtuple('SheetUpdate', ['sheet_name', 'rows', 'cells', 'number_formats', 'changes',
+                                         'gbil_matched', 'cash_matched'])
+SheetUpdate.__doc__ = """The cell updates worked out for one sheet.
+
+sheet_name     -- worksheet the cells belong to
+rows           -- data rows on the sheet
+cells          -- {cell: value} to write, including the date cell
+number_formats -- {column: number format} for the amount columns
+changes        -- ColumnChanges per amount column when incremental, else None
+gbil_matched   -- rows that found a GBIL balance
+cash_matched   -- rows that found a Cash balance
+"""
+
+# Most specific first: a full date beats a bare year and month
+_DATE_PATTERNS = [
+    (re.compile(r"(?<!\d)(\d{4})[-_. ]?(\d{2})[-_. ]?(\d{2})(?!\d)"), ("year", "month", "day")),
+    (re.compile(r"(?<!\d)(\d{1,2})[-_. ](\d{1,2})[-_. ](\d{4})(?!\d)"), ("month", "day", "year")),
+    (re.compile(r"(?<!\d)(\d{4})[-_. ](\d{1,2})(?!\d)"), ("year", "month")),
+    (re.compile(r"(?<!\d)(\d{1,2})[-_. ](\d{4})(?!\d)"), ("month", "year")),
+]
+_MONTH_NAME = re.compile(r"(?<![a-z])([a-z]{3})[a-z]*\.?[-_ ,]*(\d{4})(?!\d)", re.IGNORECASE)
+
+
+def date_key(text):
+    """The (year, month, day) a sheet or file name refers to, or None.
+
+    Understands '2024-03', '2024-03-31', '20240331', '03-31-2024',
+    '03-2024', 'Mar 2024' and 'March_2024'; day is 0 when the name only
+    gives a month.
+    """
+    for pattern, fields in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            parts = dict(zip(fields, map(int, match.groups())))
+            if 1 <= parts["month"] <= 12 and 0 <= parts.get("day", 0) <= 31:
+                return parts["year"], parts["month"], parts.get("day", 0)
+    for match in _MONTH_NAME.finditer(text):
+        abbr = match.group(1).lower()
+        months = [name.lower() for name in calendar.month_abbr]
+        if abbr in months:
+            return int(match.group(2)), months.index(abbr), 0
+    return None
+
+
+def select_sheets(sheet_names, selection):
+    """Sheets named by selection, in workbook order.
+
+    selection is a list of names or fnmatch patterns ('2024-*'), or one
+    comma-separated string of them; matching ignores case. A name or
+    pattern that matches no sheet raises KeyError.
+    """
+    if isinstance(selection, str):
+        selection = [item.strip() for item in selection.split(",") if item.strip()]
+    chosen = set()
+    for item in selection:
+        matches = [name for name in sheet_names if fnmatch.fnmatch(name.lower(), item.lower())]
+        if not matches:
+            raise KeyError(f"No worksheet matches '{item}'; sheets are: {', '.join(sheet_names)}")
+        chosen.update(matches)
+    return [name for name in sheet_names if name in chosen]
+
+
+def match_exports(sheet_names, paths, source):
+    """Pair each sheet with the export of the same month: {sheet: path}.
+
+    Months come from date_key() on the sheet name and on the file name.
+    If several exports fall in one month the latest dated one is used.
+    A single export with a single sheet is paired as-is. Sheets left
+    without an export raise ValueError.
+    """
+    if len(paths) == 1 and len(sheet_names) == 1:
+        return {sheet_names[0]: paths[0]}
+    by_month = {}
+    for path in paths:
+        key = date_key(os.path.basename(path))
+        if key is None:
+            logger.warning(f"Ignoring {source} export with no date in its name: {path}")
+            continue
+        month = key[:2]
+        if month not in by_month or key > by_month[month][0]:
+            by_month[month] = (key, path)
+
+    matched, unmatched = {}, []
+    for sheet_name in sheet_names:
+        key = date_key(sheet_name)
+        if key is not None and key[:2] in by_month:
+            matched[sheet_name] = by_month[key[:2]][1]
+        else:
+            unmatched.append(sheet_name)
+    if unmatched:
+        raise ValueError(f"No {source} export dated for sheet(s): {', '.join(unmatched)}")
+    return matched
+
+
+def plan_backfill(sheet_names, selection, gbil_files, cash_files):
+    """SheetJobs for the selected sheets, each with its month's exports."""
+    sheets = select_sheets(sheet_names, selection)
+    gbil = match_exports(sheets, gbil_files, "GBIL")
+    cash = match_exports(sheets, cash_files, "Cash")
+    return [SheetJob(name, gbil[name], cash[name]) for name in sheets]
+
+
+def log_duplicates(index, source):
+    """Warn about accounts listed more than once; the first row is used."""
+    if index.duplicates:
+        logger.warning(
+            f"{len(index.duplicates)} duplicate account(s) in {source}, "
+            f"using the first row for each: {index.duplicates[:20]}"
+        )
+
+
+def read_export_index(path, columns, source):
+    """Parse an export (through the parse cache) into (LookupIndex, rows read).
+
+    columns is GBIL_COLUMNS or CASH_COLUMNS; source names the export in
+    warnings and errors.
+    """
+    data = cached_call(load_account_values, path, *columns)
+    index = build_lookup_index(data['account'], data['value'], source=source)
+    log_duplicates(index, source)
+    return index, len(data)
+
+
+def update_sheet(sheet, gbil_index, cash_index, incremental=False, updated=None, progress=None):
+    """Work out one sheet's GBIL/Cash cell updates as a SheetUpdate.
+
+    sheet is a SheetColumns from read_sheet_columns or read_sheets_columns;
+    it is not modified. updated is the text written to the date cell
+    (default: today). progress, if given, is called as progress(rows
+    matched, total rows) after each chunk of account numbers is
+    normalized and looked up.
+    """
+    data = sheet.data
+    gbil_col = sheet.columns["GBIL Available"]
+    cash_col = sheet.columns["Cash in Account"]
+    raw_accounts = data[sheet.columns["Account"]]
+    if progress is None or not len(data):
+        accounts = normalize_account_numbers(raw_accounts)
+        gbil_values = lookup_values(gbil_index, accounts, MISSING_VALUE)
+        cash_values = lookup_values(cash_index, accounts, MISSING_VALUE)
+    else:
+        # Chunked so progress, and the cancellation it checks, keep moving
+        account_chunks, gbil_chunks, cash_chunks = [], [], []
+        progress(0, len(data))
+        for start, stop in iter_chunks(len(data)):
+            chunk = normalize_account_numbers(raw_accounts.iloc[start:stop])
+            account_chunks.append(chunk)
+            gbil_chunks.append(lookup_values(gbil_index, chunk, MISSING_VALUE))
+            cash_chunks.append(lookup_values(cash_index, chunk, MISSING_VALUE))
+            progress(stop, len(data))
+        accounts = pd.concat(account_chunks)
+        gbil_values, cash_values = pd.concat(gbil_chunks), pd.concat(cash_chunks)
+    gbil_position, cash_position = sheet.positions[gbil_col], sheet.positions[cash_col]
+
+    changes = None
+    if incremental:
+        changes = [diff_column(gbil_col, accounts, data[gbil_col], gbil_values),
+                   diff_column(cash_col, accounts, data[cash_col], cash_values)]
+        cells = {}
+        for column_changes, position, values in zip(
+                changes, (gbil_position, cash_position), (gbil_values, cash_values)):
+            cells.update(cell_updates(column_changes, position, values))
+    else:
+        cells = column_updates({gbil_position: gbil_values, cash_position: cash_values})
+    cells[DATE_CELL] = updated or datetime.now().strftime("%m/%d/%Y")
+
+    return SheetUpdate(
+        sheet_name=sheet.sheet_name,
+        rows=len(data),
+        cells=cells,
+        number_formats={gbil_position: EXCEL_MONEY_FORMAT, cash_position: EXCEL_MONEY_FORMAT},
+        changes=changes,
+        gbil_matched=int((gbil_values != MISSING_VALUE).sum()),
+        cash_matched=int((cash_values != MISSING_VALUE).sum()),
+    )
+
+
+def run_backfill(workbook, output_path, jobs, incremental=False, workers=None,
+                 progress_callback=None, cancel_token=None):
+    """Update every job's sheet with one workbook load and one save.
+
+    The selected sheets are read in a single pass over the workbook, the
+    distinct exports are parsed concurrently, each sheet is joined on a
+    thread pool, and all cell updates go into one patch_workbook call.
+    With incremental, only changed cells are written and, if nothing but
+    the date cells would change and output_path is workbook, the save is
+    skipped. Cancelling leaves output_path untouched. Returns one
+    SheetUpdate per job, in job order.
+    """
+    progress = StageProgress(progress_callback, BACKFILL_STAGES, cancel_token)
+    sheet_names = [job.sheet_name for job in jobs]
+
+    with span("load workbook") as stage:
+        progress.update("load workbook", message=f"Loading {len(jobs)} sheet(s)...")
+        sheets = cached_call(read_sheets_columns, workbook, SHEET_COLUMNS, tuple(sheet_names))
+        stage.rows = sum(len(sheet.data) for sheet in sheets.values())
+
+    exports = {}
+    for job in jobs:
+        exports.setdefault((job.gbil_file, GBIL_COLUMNS, "GBIL CSV"), None)
+        exports.setdefault((job.cash_file, CASH_COLUMNS, "Cash CSV"), None)
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            with span("read exports") as stage:
+                futures = {pool.submit(read_export_index, *export): export for export in exports}
+                stage.rows = 0
+                for done, future in enumerate(as_completed(futures), 1):
+                    exports[futures[future]], rows = future.result()
+                    stage.rows += rows
+                    progress.update("read exports", done, len(exports), "Reading exports", "files")
+
+            with span("join", rows=sum(len(sheet.data) for sheet in sheets.values())):
+                updated = datetime.now().strftime("%m/%d/%Y")
+                futures = {
+                    pool.submit(update_sheet, sheets[job.sheet_name],
+                                exports[(job.gbil_file, GBIL_COLUMNS, "GBIL CSV")],
+                                exports[(job.cash_file, CASH_COLUMNS, "Cash CSV")],
+                                incremental, updated): job.sheet_name
+                    for job in jobs
+                }
+                results = {}
+                for done, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()
+                    progress.update("join", done, len(jobs), "Matching accounts", "sheets")
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    updates = [results[name] for name in sheet_names]
+    for update in updates:
+        if update.changes is not None:
+            logger.info(f"{update.sheet_name}: " + format_changes(update.changes, limit=0).replace("\n", "; "))
+
+    values_written = sum(len(update.cells) - 1 for update in updates)
+    if (incremental and not values_written
+            and same_path(output_path, workbook)):
+        logger.info("No values changed on any sheet; leaving the workbook untouched")
+        return updates
+
+    with span("save", rows=values_written):
+        total_cells = sum(len(update.cells) for update in updates)
+        progress.update("save", 0, total_cells, "Saving updated workbook", "cells")
+        patch_workbook(workbook, output_path,
+                       {update.sheet_name: update.cells for update in updates},
+                       number_formats={update.sheet_name: update.number_formats for update in updates},
+                       progress=progress.rows_callback("save", "Saving updated workbook", "cells"))
+    logger.info(f"Backfill: {values_written:,} cells on {len(updates)} sheet(s) written to {output_path}")
+    return updates
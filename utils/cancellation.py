@@ -0,0 +1,27 @@
+import threading
+
+
+class OperationCancelled(Exception):
+    """Raised inside a running job once the user has cancelled it."""
+
+    def __init__(self, message="Operation cancelled by user"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """Thread-safe flag shared between the UI and a running job."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise OperationCancelled if cancel() has been called."""
+        if self._event.is_set():
+            raise OperationCancelled()
@@ -0,0 +1,96 @@
+from collections import namedtuple
+import numbers
+from utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+MISSING_VALUE = "#N/A"
+
+ColumnChanges = namedtuple('ColumnChanges', ['column', 'rows', 'added', 'changed', 'missing', 'unchanged'])
+ColumnChanges.__doc__ = """How a column's new values differ from what the sheet holds.
+
+column    -- column header
+rows      -- sheet row numbers whose cell must be rewritten
+added     -- accounts that now have a value where the cell was blank or '#N/A'
+changed   -- accounts whose value differs from the one in the cell
+missing   -- accounts that had a value but no longer match the source
+unchanged -- number of cells that already hold the new value
+"""
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def _is_blank(values):
+    return values.isna() | (values == '') | (values == MISSING_VALUE)
+
+
+def diff_column(column, accounts, old_values, new_values):
+    """Compare new lookup results with a column's current cell values.
+
+    All three Series share the sheet's row-number index. Numbers compare
+    by value, so 1197.48 read back from the sheet matches a freshly parsed
+    1197.48; anything else compares as text. A number stored as text is
+    rewritten so the cell becomes numeric.
+    """
+    old = pd.Series(old_values, dtype=object)
+    new = pd.Series(new_values, index=old.index, dtype=object)
+
+    old_numeric = old.map(_is_number)
+    new_numeric = new.map(_is_number)
+    both_numeric = old_numeric & new_numeric
+    same_number = both_numeric & (
+        pd.to_numeric(old.where(both_numeric), errors='coerce')
+        == pd.to_numeric(new.where(both_numeric), errors='coerce'))
+    neither_numeric = ~old_numeric & ~new_numeric
+    same_text = neither_numeric & (
+        old.where(old.notna(), '').astype(str) == new.where(new.notna(), '').astype(str))
+    rewrite = ~(same_number | same_text)
+
+    old_blank, new_blank = _is_blank(old), _is_blank(new)
+    accounts = pd.Series(accounts, index=old.index)
+    return ColumnChanges(
+        column=column,
+        rows=old.index[rewrite].tolist(),
+        added=accounts[rewrite & old_blank & ~new_blank].tolist(),
+        changed=accounts[rewrite & ~old_blank & ~new_blank].tolist(),
+        missing=accounts[rewrite & ~old_blank & new_blank].tolist(),
+        unchanged=int((~rewrite).sum()),
+    )
+
+
+def cell_updates(changes, position, new_values):
+    """{(row, position): value} for just the rows changes says to rewrite."""
+    return {(row, position): new_values[row] for row in changes.rows}
+
+
+def format_changes(changes, limit=20):
+    """Summary line per column, then up to limit accounts of each kind.
+
+    limit=0 gives just the summary lines.
+    """
+    lines = []
+    for column in changes:
+        lines.append(f"{column.column}: {len(column.added):,} added, {len(column.changed):,} changed, "
+                     f"{len(column.missing):,} missing, {column.unchanged:,} unchanged")
+    for column in changes:
+        for kind in ('added', 'changed', 'missing'):
+            accounts = getattr(column, kind)
+            if accounts and limit:
+                more = f" (+{len(accounts) - limit:,} more)" if len(accounts) > limit else ""
+                lines.append(f"  {column.column} {kind}: {', '.join(map(str, accounts[:limit]))}{more}")
+    return "\n".join(lines)
+
+
+def changes_summary(changes):
+    """Changes as plain dicts with account lists, e.g. for JSON output."""
+    return {
+        column.column: {
+            'added': column.added,
+            'changed': column.changed,
+            'missing': column.missing,
+            'unchanged': column.unchanged,
+        }
+        for column in changes
+    }
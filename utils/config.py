@@ -0,0 +1,25 @@
+import json
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "config.json")
+
+_cache = {"mtime": None, "data": {}}
+
+
+def load_config():
+    """Return the parsed config/config.json, re-reading it when it changes."""
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+    except OSError:
+        return {}
+    if mtime != _cache["mtime"]:
+        with open(CONFIG_PATH, encoding="utf-8") as f:
+            text = f.read().strip()
+        _cache["data"] = json.loads(text) if text else {}
+        _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def get_setting(section, key, default=None):
+    """Look up config[section][key], falling back to default."""
+    return load_config().get(section, {}).get(key, default)
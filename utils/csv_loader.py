@@ -0,0 +1,83 @@
+import logging
+from utils.lazy_import import is_available, lazy_import
+from utils.money import parse_money
+from utils.normalize import normalize_account_numbers
+
+pd = lazy_import('pandas')
+if is_available('pyarrow'):
+    pa = lazy_import('pyarrow')
+    pa_csv = lazy_import('pyarrow.csv')
+    DEFAULT_ENGINE = "pyarrow"
+else:
+    pa = pa_csv = None
+    DEFAULT_ENGINE = "c"
+
+logger = logging.getLogger(__name__)
+
+
+def pyarrow_usable():
+    """True if pyarrow is installed and actually imports.
+
+    is_available only finds the package; a broken install (missing DLL,
+    ABI mismatch) fails on first use instead. That is logged once and the
+    C parser is used from then on.
+    """
+    global pa, pa_csv
+    if pa_csv is None:
+        return False
+    try:
+        pa_csv.ConvertOptions  # first attribute access performs the import
+    except Exception as e:
+        logger.warning(f"pyarrow is installed but cannot be imported, using the C CSV parser: {e}")
+        pa = pa_csv = None
+        return False
+    return True
+
+
+def read_csv_columns(path, columns, engine=None):
+    """Read only the named columns of a CSV, every one as string.
+
+    Raises KeyError listing the available headers if a column is missing.
+    Uses the pyarrow parser when it is installed and falls back to the C
+    parser if pyarrow is unavailable or rejects the file.
+    """
+    available = pd.read_csv(path, nrows=0).columns.tolist()
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise KeyError(f"Column(s) {missing} not found in {path}. Available columns: {available}")
+
+    engine = engine or DEFAULT_ENGINE
+    if engine == "pyarrow" and pyarrow_usable():
+        try:
+            return _read_with_pyarrow(path, columns)
+        except (pa.ArrowInvalid, ValueError):
+            pass
+    return pd.read_csv(
+        path, engine="c", usecols=list(columns),
+        dtype={col: str for col in columns}, keep_default_na=False,
+    )
+
+
+def _read_with_pyarrow(path, columns):
+    # Declare the column types up front so keys like '00123' are never
+    # inferred as integers and lose their leading zeros
+    convert = pa_csv.ConvertOptions(
+        include_columns=list(columns),
+        column_types={col: pa.string() for col in columns},
+        strings_can_be_null=False,
+    )
+    table = pa_csv.read_csv(path, convert_options=convert)
+    return pd.DataFrame({col: table.column(col).to_pandas() for col in columns})
+
+
+def load_account_values(path, key_column, value_column, engine=None):
+    """Load a custodian export as a (account, value) frame.
+
+    Only the two columns are parsed. Account keys are normalized with
+    normalize_account_numbers and values are parsed with parse_money.
+    """
+    frame = read_csv_columns(path, [key_column, value_column], engine=engine)
+    return pd.DataFrame({
+        'account': normalize_account_numbers(frame[key_column]),
+        'value': parse_money(frame[value_column]),
+    })
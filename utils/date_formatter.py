@@ -0,0 +1,110 @@
+import calendar
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+AGENDA_DATE_FORMAT = "%B %d, %Y"
+PARSE_CACHE_SIZE = 4096
+
+# Full and abbreviated English month names, plus the common "Sept"
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+
+# Each pattern captures named year/month/day groups; month may be a name.
+# The ordinal suffix is matched only directly after the day number, so
+# month names such as "August" are never touched.
+_PATTERNS = (
+    re.compile(r"^(?P<month>[A-Za-z]+)\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>\d{4})$", re.IGNORECASE),
+    re.compile(r"^(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})$"),
+    re.compile(r"^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$"),
+)
+
+
+def _month_number(month):
+    return int(month) if month.isdigit() else MONTHS.get(month.lower(), 0)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_text(text):
+    for pattern in _PATTERNS:
+        match = pattern.match(text)
+        if match:
+            try:
+                return datetime(int(match["year"]), _month_number(match["month"]), int(match["day"]))
+            except ValueError:
+                break
+    raise ValueError(f"Invalid date format: {text}")
+
+
+def parse_date(value):
+    """Parse 'August 5th, 2024', '08/05/2024' or '2024-08-05' to a datetime.
+
+    Month names may be full or abbreviated and the day may carry an ordinal
+    suffix. Results are memoized, so repeated date strings are parsed once.
+    datetime and date values are returned as datetimes unchanged. Raises
+    ValueError for anything else.
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date format: {value!r}")
+    return _parse_text(" ".join(value.split()))
+
+
+def parse_dates(values, errors="raise"):
+    """Parse a column of date strings in one vectorized pass.
+
+    Accepts the same formats as parse_date. Each distinct string is matched
+    once against the patterns with pandas string methods, and the results
+    are broadcast back to every row. Returns a datetime64 Series aligned
+    with values. With errors='coerce' unparseable entries become NaT;
+    with 'raise' (the default) the first one raises ValueError.
+    """
+    if errors not in ("raise", "coerce"):
+        raise ValueError("errors must be 'raise' or 'coerce'")
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values)
+    if not len(uniques):
+        # Nothing but missing values (or no rows at all)
+        return pd.Series(pd.NaT, index=values.index, name=values.name, dtype="datetime64[ns]")
+
+    text = pd.Series(uniques, dtype="string").str.split().str.join(" ")
+    parts = pd.DataFrame(index=text.index, columns=["year", "month", "day"], dtype="string")
+    for pattern in _PATTERNS:
+        # First matching pattern wins, as in parse_date
+        parts = parts.combine_first(text.str.extract(pattern)[["year", "month", "day"]])
+
+    names = parts["month"].str.lower().map(MONTHS)
+    month = np.where(parts["month"].str.isdigit().fillna(False), _numbers(parts["month"]), _numbers(names))
+    parsed = pd.to_datetime(pd.DataFrame({
+        "year": _numbers(parts["year"]),
+        "month": month,
+        "day": _numbers(parts["day"]),
+    }), errors="coerce")
+
+    # Missing values have code -1, which picks the NaT appended at the end
+    dates = np.append(parsed.to_numpy(), np.array(["NaT"], dtype=parsed.dtype))
+    result = pd.Series(dates[codes], index=values.index, name=values.name)
+    if errors == "raise":
+        bad = result.isna() & values.notna()
+        if bad.any():
+            raise ValueError(f"Invalid date format: {values[bad].iloc[0]}")
+    return result
+
+
+def _numbers(values):
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def format_date(value, fmt=AGENDA_DATE_FORMAT):
+    """Parse value with parse_date and format it, e.g. 'August 05, 2024'."""
+    return parse_date(value).strftime(fmt)
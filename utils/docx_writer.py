@@ -0,0 +1,79 @@
+from utils.lazy_import import lazy_import
+
+docx_style = lazy_import('docx.enum.style')
+docx_oxml = lazy_import('docx.oxml')
+docx_ns = lazy_import('docx.oxml.ns')
+
+
+def escape(text):
+    """Escape &, < and > for XML text and attribute values.
+
+    Same as xml.sax.saxutils.escape, which is avoided because importing
+    it pulls in urllib.request.
+    """
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def resolve_style_ids(doc, style_names):
+    """Map paragraph style names to the style IDs used in document.xml.
+
+    The default paragraph style maps to None, as python-docx omits pStyle
+    for it. Raises KeyError for a name the document does not define.
+    """
+    return {
+        name: doc.part.get_style_id(doc.styles[name], docx_style.WD_STYLE_TYPE.PARAGRAPH)
+        for name in style_names
+    }
+
+
+def _text_element(text):
+    if text.strip() != text:
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f"<w:t>{escape(text)}</w:t>"
+
+
+def run_xml(text):
+    """Return run content for text, matching python-docx's Run.text setter.
+
+    Tabs become <w:tab/> and line breaks <w:br/>, with the text between
+    them in <w:t> elements.
+    """
+    parts, pending = [], []
+    for char in text:
+        if char in "\t\n\r":
+            if pending:
+                parts.append(_text_element("".join(pending)))
+                pending = []
+            parts.append("<w:tab/>" if char == "\t" else "<w:br/>")
+        else:
+            pending.append(char)
+    if pending:
+        parts.append(_text_element("".join(pending)))
+    return "".join(parts)
+
+
+def paragraph_xml(text, style_id):
+    """Serialize one paragraph exactly as Document.add_paragraph would."""
+    ppr = f'<w:pPr><w:pStyle w:val="{escape(style_id)}"/></w:pPr>' if style_id else ""
+    run = f"<w:r>{run_xml(text)}</w:r>" if text else ""
+    return f"<w:p>{ppr}{run}</w:p>"
+
+
+def append_paragraphs(doc, lines, style_ids):
+    """Append (text, style name) lines to the end of the document body.
+
+    All paragraphs are built as one XML string and parsed in a single call,
+    instead of one python-docx style lookup and object graph per line. The
+    resulting document.xml is byte-identical to calling
+    doc.add_paragraph(text, style=name) for each line.
+    """
+    xml = "".join(paragraph_xml(text, style_ids[style]) for text, style in lines)
+    fragment = docx_oxml.parse_xml(f"<w:body {docx_ns.nsdecls('w')}>{xml}</w:body>")
+    body = doc.element.body
+    # New paragraphs go before the trailing section properties, like add_paragraph
+    anchor = body.sectPr
+    for paragraph in list(fragment):
+        if anchor is not None:
+            anchor.addprevious(paragraph)
+        else:
+            body.append(paragraph)
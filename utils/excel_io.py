@@ -0,0 +1,490 @@
+from collections import namedtuple
+import bisect
+import copy
+import itertools
+import numbers
+import os
+import struct
+import tempfile
+import zipfile
+from utils.lazy_import import lazy_import
+
+etree = lazy_import('lxml.etree')
+openpyxl = lazy_import('openpyxl')
+cell_utils = lazy_import('openpyxl.utils.cell')
+pd = lazy_import('pandas')
+
+SheetColumns = namedtuple('SheetColumns', ['sheet_name', 'header', 'columns', 'positions', 'data'])
+SheetColumns.__doc__ = """Columns read from one worksheet.
+
+sheet_name -- worksheet the data came from
+header     -- full header row (row 1) as read from the sheet
+columns    -- {expected name: actual header text}
+positions  -- {actual header text: 1-based column number}
+data       -- DataFrame of the requested columns, indexed by Excel row number
+"""
+
+
+def find_column(expected_name, column_names):
+    """Match a header case-insensitively, ignoring surrounding whitespace."""
+    expected = expected_name.strip().lower()
+    for col in column_names:
+        if isinstance(col, str) and col.strip().lower() == expected:
+            return col
+    raise KeyError(f"'{expected_name}' column not found in the worksheet.")
+
+
+def read_sheet_columns(path, column_names, sheet_name=None):
+    """Stream only the named columns of one sheet into a DataFrame.
+
+    The workbook is opened read-only, so other sheets are never parsed and
+    only cells inside the span of the requested columns are materialised.
+    Defaults to the far-right sheet.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        if sheet_name is None:
+            sheet_name = wb.sheetnames[-1]
+        return _read_columns(wb[sheet_name], sheet_name, column_names)
+    finally:
+        wb.close()
+
+
+def read_sheets_columns(path, column_names, sheet_names):
+    """Like read_sheet_columns for several sheets, opening the workbook once.
+
+    Returns {sheet name: SheetColumns} in the order of sheet_names. The
+    shared strings and workbook parts are parsed once for all sheets.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        missing = [name for name in sheet_names if name not in wb.sheetnames]
+        if missing:
+            raise KeyError(f"Worksheet(s) not found: {', '.join(missing)}")
+        return {name: _read_columns(wb[name], name, column_names) for name in sheet_names}
+    finally:
+        wb.close()
+
+
+def list_sheet_names(path):
+    """Worksheet names in workbook order, without loading any sheet."""
+    with zipfile.ZipFile(path) as zf:
+        return list(sheet_part_names(zf))
+
+
+def _read_columns(ws, sheet_name, column_names):
+    rows = ws.iter_rows(values_only=True)
+    header = list(next(rows, ()))
+
+    columns = {name: find_column(name, header) for name in column_names}
+    positions = {col: header.index(col) + 1 for col in columns.values()}
+    min_col = min(positions.values())
+    offsets = [positions[columns[name]] - min_col for name in column_names]
+    width = max(offsets) + 1
+
+    values = {name: [] for name in column_names}
+    for row in ws.iter_rows(min_row=2, min_col=min_col, max_col=min_col + width - 1,
+                            values_only=True):
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        for name, offset in zip(column_names, offsets):
+            values[name].append(row[offset])
+
+    data = pd.DataFrame(
+        {columns[name]: values[name] for name in column_names},
+        index=pd.RangeIndex(2, 2 + len(values[column_names[0]]), name='row'),
+    )
+    return SheetColumns(sheet_name, header, columns, positions, data)
+
+
+# --- Targeted cell patching -------------------------------------------------
+#
+# An .xlsx file is a zip of XML parts. To change a handful of cells we only
+# need to rewrite the worksheet parts that hold them; every other part (other
+# sheets, styles, drawings, pivot caches...) is copied over as the original
+# compressed bytes without being decompressed or re-serialised.
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+ERROR_CODES = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+CALC_CHAIN_PART = "xl/calcChain.xml"
+STYLES_PART = "xl/styles.xml"
+FIRST_CUSTOM_NUM_FMT = 164
+# patch_sheet_xml reports progress after this many cells
+PROGRESS_CELLS = 10000
+
+
+def _q(tag):
+    return f"{{{NS_MAIN}}}{tag}"
+
+
+def _resolve_part(target, base="xl"):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    parts = f"{base}/{target}".split("/")
+    resolved = []
+    for part in parts:
+        if part == "..":
+            resolved.pop()
+        elif part and part != ".":
+            resolved.append(part)
+    return "/".join(resolved)
+
+
+def sheet_part_names(zf):
+    """Return {sheet name: zip part name} for every worksheet in the archive."""
+    workbook = etree.fromstring(zf.read("xl/workbook.xml"))
+    rels = etree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship")}
+    return {
+        sheet.get("name"): _resolve_part(targets[sheet.get(f"{{{NS_REL}}}id")])
+        for sheet in workbook.iter(_q("sheet"))
+    }
+
+
+def _cell_key(key):
+    """Normalise an 'L2' or (row, column) key to (row, column)."""
+    if isinstance(key, str):
+        column, row = cell_utils.coordinate_from_string(key)
+        return row, cell_utils.column_index_from_string(column)
+    return int(key[0]), int(key[1])
+
+
+def _child_index(parent, tag, index_of, reference_for):
+    """Map 1-based index -> element for parent's children with the given tag.
+
+    index_of turns an r attribute into the index. r is optional on rows
+    and cells, and an element without it follows the previous sibling; it
+    is given the r that reference_for(index) returns, so rows or cells
+    inserted later cannot shift it.
+    """
+    index, children = 0, {}
+    for child in parent.iterchildren(tag):
+        reference = child.get("r")
+        if reference:
+            index = index_of(reference)
+        else:
+            index += 1
+            child.set("r", reference_for(index))
+        children[index] = child
+    return children
+
+
+def _insert_ordered(parent, existing, order, index, element):
+    """Insert element before the first sibling whose index is larger.
+
+    order is the sorted list of existing's keys and is kept in sync.
+    """
+    position = bisect.bisect_left(order, index)
+    if position < len(order):
+        existing[order[position]].addprevious(element)
+    else:
+        parent.append(element)
+    order.insert(position, index)
+    existing[index] = element
+
+
+class CellFormats:
+    """Number formats added to a workbook's styles part while patching.
+
+    Hands out cellXfs indexes that copy an existing cell format with a
+    different number format, so fonts, fills and borders are kept. Each
+    (cell format, number format) pair gets one new xf, however many cells
+    use it.
+    """
+
+    def __init__(self, xml_bytes):
+        self.root = etree.fromstring(xml_bytes)
+        self.modified = False
+        self._cell_xfs = self.root.find(_q("cellXfs"))
+        self._derived = {}
+        # Only the registered formats; <dxfs> holds numFmts of its own for
+        # conditional formatting that cells cannot refer to
+        num_fmts = self.root.find(_q("numFmts"))
+        self._num_fmt_ids = {
+            num_fmt.get("formatCode"): int(num_fmt.get("numFmtId"))
+            for num_fmt in (num_fmts.iterfind(_q("numFmt")) if num_fmts is not None else ())
+        }
+
+    def xf_for(self, base_xf, format_code):
+        """Return the cellXfs index for base_xf with format_code applied."""
+        key = (base_xf, format_code)
+        if key not in self._derived:
+            xfs = self._cell_xfs.findall(_q("xf"))
+            num_fmt_id = str(self._num_fmt_id(format_code))
+            base = xfs[base_xf] if base_xf < len(xfs) else xfs[0]
+            if base.get("numFmtId") == num_fmt_id:
+                self._derived[key] = base_xf
+            else:
+                xf = copy.deepcopy(base)
+                xf.set("numFmtId", num_fmt_id)
+                xf.set("applyNumberFormat", "1")
+                self._cell_xfs.append(xf)
+                self._cell_xfs.set("count", str(len(xfs) + 1))
+                self._derived[key] = len(xfs)
+                self.modified = True
+        return self._derived[key]
+
+    def _num_fmt_id(self, format_code):
+        if format_code not in self._num_fmt_ids:
+            num_fmts = self.root.find(_q("numFmts"))
+            if num_fmts is None:
+                # numFmts must be the first child of styleSheet
+                num_fmts = etree.Element(_q("numFmts"))
+                self.root.insert(0, num_fmts)
+            num_fmt_id = max([FIRST_CUSTOM_NUM_FMT - 1, *self._num_fmt_ids.values()]) + 1
+            etree.SubElement(num_fmts, _q("numFmt"), numFmtId=str(num_fmt_id), formatCode=format_code)
+            num_fmts.set("count", str(len(num_fmts)))
+            self._num_fmt_ids[format_code] = num_fmt_id
+            self.modified = True
+        return self._num_fmt_ids[format_code]
+
+    def tostring(self):
+        return etree.tostring(self.root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def _is_number(value):
+    return (isinstance(value, numbers.Number) and not isinstance(value, bool)
+            and not (isinstance(value, float) and value != value))
+
+
+def _set_cell_value(cell, value):
+    """Replace a <c> element's content with value, keeping its style.
+
+    Returns True if a formula was removed from the cell.
+    """
+    had_formula = cell.find(_q("f")) is not None
+    for child in list(cell):
+        if child.tag in (_q("f"), _q("v"), _q("is")):
+            cell.remove(child)
+    cell.attrib.pop("t", None)
+
+    if value is None or (isinstance(value, float) and value != value):
+        return had_formula
+    if isinstance(value, bool):
+        cell.set("t", "b")
+        etree.SubElement(cell, _q("v")).text = "1" if value else "0"
+    elif isinstance(value, numbers.Number):
+        etree.SubElement(cell, _q("v")).text = repr(value.item() if hasattr(value, "item") else value)
+    else:
+        text = str(value)
+        if text in ERROR_CODES:
+            cell.set("t", "e")
+            etree.SubElement(cell, _q("v")).text = text
+        else:
+            cell.set("t", "inlineStr")
+            t = etree.SubElement(etree.SubElement(cell, _q("is")), _q("t"))
+            t.text = text
+            if text != text.strip():
+                t.set(XML_SPACE, "preserve")
+    return had_formula
+
+
+def patch_sheet_xml(xml_bytes, cells, number_formats=None, cell_formats=None, progress=None):
+    """Apply {(row, column): value} to one worksheet part.
+
+    number_formats maps column number -> Excel format code for numeric
+    values written to that column; cell_formats is the CellFormats that
+    allocates the styles. progress, if given, is called as
+    progress(cells written) every PROGRESS_CELLS cells. Returns (new xml
+    bytes, True if any formulas were overwritten).
+    """
+    number_formats = number_formats if cell_formats is not None else None
+    root = etree.fromstring(xml_bytes)
+    sheet_data = root.find(_q("sheetData"))
+    removed_formula = False
+    written = 0
+
+    by_row = {}
+    for key, value in cells.items():
+        row, column = _cell_key(key)
+        by_row.setdefault(row, {})[column] = value
+
+    row_tag, cell_tag = _q("row"), _q("c")
+    rows = _child_index(sheet_data, row_tag, int, str)
+    row_order = sorted(rows)
+    for row_idx in sorted(by_row):
+        row = rows.get(row_idx)
+        if row is None:
+            row = etree.Element(row_tag, r=str(row_idx))
+            _insert_ordered(sheet_data, rows, row_order, row_idx, row)
+        # Spans are an optional load hint and may no longer be accurate
+        row.attrib.pop("spans", None)
+
+        row_cells = _child_index(row, cell_tag, lambda ref: _cell_key(ref)[1],
+                                 lambda col, r=row_idx: f"{cell_utils.get_column_letter(col)}{r}")
+        cell_order = sorted(row_cells)
+        for col_idx in sorted(by_row[row_idx]):
+            cell = row_cells.get(col_idx)
+            if cell is None:
+                cell = etree.Element(cell_tag, r=f"{cell_utils.get_column_letter(col_idx)}{row_idx}")
+                _insert_ordered(row, row_cells, cell_order, col_idx, cell)
+            value = by_row[row_idx][col_idx]
+            removed_formula |= _set_cell_value(cell, value)
+            if number_formats and col_idx in number_formats and _is_number(value):
+                cell.set("s", str(cell_formats.xf_for(int(cell.get("s", 0)), number_formats[col_idx])))
+            written += 1
+            if progress and written % PROGRESS_CELLS == 0:
+                progress(written)
+
+    xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    return xml, removed_formula
+
+
+def _drop_calc_chain(parts):
+    """Remove calcChain references so Excel rebuilds it instead of repairing."""
+    rels_name = "xl/_rels/workbook.xml.rels"
+    rels = etree.fromstring(parts[rels_name])
+    for rel in list(rels):
+        if rel.get("Target", "").endswith("calcChain.xml"):
+            rels.remove(rel)
+    parts[rels_name] = etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    types = etree.fromstring(parts["[Content_Types].xml"])
+    for override in list(types):
+        if override.get("PartName") == f"/{CALC_CHAIN_PART}":
+            types.remove(override)
+    parts["[Content_Types].xml"] = etree.tostring(
+        types, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+# ZipFile/ZipInfo internals _copy_raw_member relies on; checked before use
+_RAW_COPY_ZIPFILE_ATTRS = ("fp", "start_dir", "filelist", "NameToInfo", "_didModify")
+_RAW_COPY_ZIPINFO_ATTRS = ("FileHeader", "header_offset", "compress_size", "flag_bits")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def _raw_copy_supported(out, info):
+    return (all(hasattr(out, attr) for attr in _RAW_COPY_ZIPFILE_ATTRS)
+            and all(hasattr(info, attr) for attr in _RAW_COPY_ZIPINFO_ATTRS))
+
+
+def _copy_member(zin, src_fp, out, info):
+    """Copy a member unchanged, as raw compressed bytes where possible.
+
+    The raw copy uses private zipfile internals; if they are missing, or
+    the member's local header does not look as expected, the member is
+    read and written again through the public API instead.
+    """
+    if _raw_copy_supported(out, info) and _copy_raw_member(src_fp, out, info):
+        return
+    out.writestr(copy.copy(info), zin.read(info))
+
+
+def _copy_raw_member(src_fp, out, info):
+    """Copy a member's compressed bytes into out without recompressing.
+
+    Returns False, having written nothing, if the local header is not
+    where the central directory says.
+    """
+    src_fp.seek(info.header_offset)
+    header = src_fp.read(30)
+    if len(header) < 30 or header[:4] != LOCAL_HEADER_SIGNATURE:
+        return False
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    src_fp.seek(info.header_offset + 30 + name_len + extra_len)
+    raw = src_fp.read(info.compress_size)
+
+    zinfo = copy.copy(info)
+    zinfo.flag_bits &= ~0x08  # sizes and CRC go in the local header
+    zinfo.header_offset = out.fp.tell()
+    out.fp.write(zinfo.FileHeader())
+    out.fp.write(raw)
+    out.start_dir = out.fp.tell()
+    out.filelist.append(zinfo)
+    out.NameToInfo[zinfo.filename] = zinfo
+    out._didModify = True
+    return True
+
+
+def column_updates(columns, first_row=2):
+    """Build a patch_workbook cell map from {column number: values}."""
+    cells = {}
+    for col_index, values in columns.items():
+        values = list(values)
+        cells.update(zip(
+            zip(range(first_row, first_row + len(values)), itertools.repeat(col_index)),
+            values,
+        ))
+    return cells
+
+
+def patch_workbook(src, dst, updates, number_formats=None, progress=None):
+    """Write cell updates into a copy of an .xlsx without a full round-trip.
+
+    updates maps sheet name -> {cell: value}, where cell is an 'L2' style
+    coordinate or a (row, column) tuple. Only the affected worksheet parts
+    are rewritten; all other parts are copied byte-for-byte. Cell styles
+    are preserved, except that number_formats, {sheet name: {column: format
+    code}} with columns as numbers or letters, gives numeric values written
+    to those columns that number format. dst may equal src, in which case
+    the file is replaced atomically once the new copy is complete.
+
+    progress, if given, is called as progress(cells written, total cells)
+    while sheets are patched and once more just before dst is replaced.
+    If it raises (e.g. OperationCancelled) the temporary copy is removed
+    and dst is left untouched.
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=dst_dir)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(src) as zin:
+            sheet_parts = sheet_part_names(zin)
+            missing = [name for name in updates if name not in sheet_parts]
+            if missing:
+                raise KeyError(f"Worksheet(s) not found: {', '.join(missing)}")
+
+            names = zin.namelist()
+            cell_formats = None
+            if number_formats and STYLES_PART in names:
+                cell_formats = CellFormats(zin.read(STYLES_PART))
+
+            rewritten = {}
+            removed_formula = False
+            total_cells = sum(len(cells) for cells in updates.values())
+            done_cells = 0
+            for sheet_name, cells in updates.items():
+                part = sheet_parts[sheet_name]
+                formats = {
+                    cell_utils.column_index_from_string(col) if isinstance(col, str) else int(col): code
+                    for col, code in (number_formats or {}).get(sheet_name, {}).items()
+                }
+                sheet_progress = None
+                if progress:
+                    sheet_progress = lambda n, base=done_cells: progress(base + n, total_cells)
+                rewritten[part], removed = patch_sheet_xml(
+                    zin.read(part), cells, formats, cell_formats, sheet_progress)
+                removed_formula |= removed
+                done_cells += len(cells)
+                if progress:
+                    progress(done_cells, total_cells)
+            if cell_formats is not None and cell_formats.modified:
+                rewritten[STYLES_PART] = cell_formats.tostring()
+
+            if removed_formula and CALC_CHAIN_PART in names:
+                for part in ("xl/_rels/workbook.xml.rels", "[Content_Types].xml"):
+                    rewritten[part] = zin.read(part)
+                _drop_calc_chain(rewritten)
+
+            with open(src, "rb") as src_fp, zipfile.ZipFile(tmp_path, "w") as zout:
+                for info in zin.infolist():
+                    if removed_formula and info.filename == CALC_CHAIN_PART:
+                        continue
+                    if info.filename in rewritten:
+                        zinfo = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                        zinfo.compress_type = zipfile.ZIP_DEFLATED
+                        zinfo.external_attr = info.external_attr
+                        zout.writestr(zinfo, rewritten[info.filename])
+                    else:
+                        _copy_member(zin, src_fp, zout, info)
+            if progress:
+                # Last chance to stop before dst is touched
+                progress(total_cells, total_cells)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
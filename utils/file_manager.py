@@ -0,0 +1,164 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+APP_NAME = "ElkRun"
+
+logger = logging.getLogger(__name__)
+
+
+def app_data_dir(*parts):
+    """Return (and create) a per-user local directory for ElkRun data.
+
+    %LOCALAPPDATA%\\ElkRun on Windows, ~/.cache/elkrun elsewhere. Extra
+    path parts are joined on, e.g. app_data_dir("cache").
+    """
+    if sys.platform == "win32":
+        base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), APP_NAME)
+    else:
+        base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), APP_NAME.lower())
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# --- Local staging for network-share inputs and outputs ----------------------
+
+COPY_CHUNK_BYTES = 16 * 1024 * 1024
+
+CopyTiming = namedtuple('CopyTiming', ['source', 'destination', 'bytes', 'seconds'])
+
+
+def is_network_path(path):
+    """True for UNC paths (\\\\server\\share\\...) and //server/share paths."""
+    path = str(path)
+    return path.startswith("\\\\") or path.startswith("//")
+
+
+def path_key(path):
+    """Absolute, case-normalized form of path, for comparing or grouping paths."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def same_path(first, second):
+    """True if two paths name the same file, however each is spelled."""
+    return path_key(first) == path_key(second)
+
+
+def copy_file_chunked(src, dst, chunk_bytes=COPY_CHUNK_BYTES):
+    """Copy src to dst in large sequential reads, keeping timestamps.
+
+    Returns a CopyTiming for the copy.
+    """
+    start = time.perf_counter()
+    copied = 0
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        while True:
+            chunk = fin.read(chunk_bytes)
+            if not chunk:
+                break
+            fout.write(chunk)
+            copied += len(chunk)
+    shutil.copystat(src, dst)
+    return CopyTiming(src, dst, copied, time.perf_counter() - start)
+
+
+def publish_atomic(local_path, dest_path, chunk_bytes=COPY_CHUNK_BYTES):
+    """Copy local_path to dest_path so readers never see a partial file.
+
+    The data is written to a temporary file next to dest_path and renamed
+    over it only once the copy is complete, so a dropped connection leaves
+    the previous version intact. Returns a CopyTiming.
+    """
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=dest_dir)
+    os.close(fd)
+    try:
+        timing = copy_file_chunked(local_path, tmp_path, chunk_bytes)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return timing._replace(destination=dest_path)
+
+
+class StagingArea:
+    """Work on local copies of remote files, then publish results atomically.
+
+    Used as a context manager: stage_in() copies inputs into a private temp
+    directory concurrently, local_path_for() names a local scratch path for
+    an output, and publish() moves it to its real destination. Every copy
+    is recorded in timings and logged. The temp directory is removed on exit.
+
+    With enabled=False (the default for purely local paths) files are used
+    where they are and publish() is a no-op, so callers need no branches.
+    """
+
+    def __init__(self, enabled=True, max_workers=4, chunk_bytes=COPY_CHUNK_BYTES):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self.chunk_bytes = chunk_bytes
+        self.timings = []
+        self.directory = None
+
+    @classmethod
+    def for_paths(cls, *paths, **kwargs):
+        """Enable staging only if any of the paths is on a network share."""
+        return cls(enabled=any(is_network_path(p) for p in paths if p), **kwargs)
+
+    def __enter__(self):
+        if self.enabled:
+            self.directory = tempfile.mkdtemp(prefix="staging-", dir=app_data_dir("staging"))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+        return False
+
+    def stage_in(self, paths):
+        """Copy paths locally in parallel and return {original: local path}."""
+        paths = list(dict.fromkeys(p for p in paths if p))
+        if not self.enabled:
+            return {path: path for path in paths}
+        targets = {path: self.local_path_for(path) for path in paths}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(copy_file_chunked, src, dst, self.chunk_bytes)
+                       for src, dst in targets.items()]
+            for future in futures:
+                self._record("Staged", future.result())
+        return targets
+
+    def local_path_for(self, path):
+        """Return a unique local scratch path with the same file name."""
+        if not self.enabled:
+            return path
+        folder = tempfile.mkdtemp(dir=self.directory)
+        return os.path.join(folder, os.path.basename(path.replace("\\", "/")))
+
+    def publish(self, local_path, dest_path):
+        """Atomically copy a locally produced file to its destination."""
+        if not self.enabled or same_path(local_path, dest_path):
+            return None
+        timing = publish_atomic(local_path, dest_path, self.chunk_bytes)
+        self._record("Published", timing)
+        return timing
+
+    def total_seconds(self):
+        return sum(t.seconds for t in self.timings)
+
+    def _record(self, action, timing):
+        self.timings.append(timing)
+        megabytes = timing.bytes / (1024 * 1024)
+        rate = megabytes / timing.seconds if timing.seconds else float("inf")
+        logger.info(
+            f"{action} {timing.source} -> {timing.destination}: "
+            f"{megabytes:.1f} MB in {timing.seconds:.2f}s ({rate:.1f} MB/s)"
+        )
@@ -0,0 +1,271 @@
+from collections import namedtuple
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from utils.config import get_setting
+from utils.file_manager import app_data_dir
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+Span = namedtuple('Span', ['name', 'start', 'seconds', 'rows', 'peak_mb', 'rss_mb', 'depth'])
+Span.__doc__ = """A timed stage of a run.
+
+name    -- stage name, e.g. 'load workbook' or 'join'
+start   -- seconds from the start of the run to the start of the stage
+seconds -- wall time of the stage
+rows    -- rows processed, or None if the stage did not say
+peak_mb -- peak traced Python allocations during the stage (tracemalloc), or None
+           if not traced or another run was tracing at the same time
+rss_mb  -- peak resident set size of the process so far, or None if unavailable
+depth   -- nesting level; 0 for top-level stages
+"""
+
+_current = contextvars.ContextVar("instrumentation", default=None)
+
+# tracemalloc is process-wide, so runs share it: it is started by the first
+# run that wants it and stopped when the last one finishes. Its peak is
+# shared too, so spans only record one while their run is the sole tracer;
+# _tracing_epoch changes whenever a run joins another one that is tracing.
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_epoch = 0
+_tracing_started = False
+
+
+def _start_tracing():
+    global _tracing_runs, _tracing_epoch, _tracing_started
+    with _tracing_lock:
+        if _tracing_runs == 0:
+            # Leave tracing alone if someone else (PYTHONTRACEMALLOC) started it
+            _tracing_started = not tracemalloc.is_tracing()
+            if _tracing_started:
+                tracemalloc.start()
+        else:
+            _tracing_epoch += 1
+        _tracing_runs += 1
+
+
+def _stop_tracing():
+    global _tracing_runs
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _tracing_started:
+            tracemalloc.stop()
+
+
+def _sole_tracing_epoch():
+    """The current epoch if only one run is tracing, else None."""
+    with _tracing_lock:
+        return _tracing_epoch if _tracing_runs == 1 else None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak / MB if sys.platform == "darwin" else peak / 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / MB
+    return None
+
+
+def describe(span):
+    """One-line summary, e.g. 'join: 0.120 s, 30,000 rows (250,000 rows/s), 41.0 MB peak'."""
+    text = f"{span.name}: {span.seconds:.3f} s"
+    if span.rows is not None:
+        text += f", {span.rows:,} rows"
+        if span.seconds > 0:
+            text += f" ({span.rows / span.seconds:,.0f} rows/s)"
+    if span.peak_mb is not None:
+        text += f", {span.peak_mb:.1f} MB peak"
+    if span.rss_mb is not None:
+        text += f", {span.rss_mb:.0f} MB RSS"
+    return text
+
+
+def format_spans(spans):
+    """Spans as an indented table, one stage per line."""
+    lines = []
+    for span in sorted(spans, key=lambda s: s.start):
+        name = "  " * span.depth + span.name
+        rows = f"{span.rows:>12,}" if span.rows is not None else " " * 12
+        peak = f"{span.peak_mb:>9.1f} MB" if span.peak_mb is not None else ""
+        lines.append(f"{name:<28}{span.seconds:>9.3f} s{rows}{peak}")
+    return "\n".join(lines)
+
+
+def trace_events(spans, pid=None, tid=None):
+    """Spans as Chrome trace 'complete' events (timestamps in microseconds)."""
+    pid = os.getpid() if pid is None else pid
+    tid = threading.get_ident() if tid is None else tid
+    events = []
+    for span in spans:
+        args = {key: value for key, value in (
+            ("rows", span.rows), ("peak_mb", span.peak_mb), ("rss_mb", span.rss_mb)) if value is not None}
+        events.append({
+            "name": span.name, "cat": "stage", "ph": "X", "pid": pid, "tid": tid,
+            "ts": round(span.start * 1e6), "dur": round(span.seconds * 1e6), "args": args,
+        })
+    return events
+
+
+class _OpenSpan:
+    """Handle yielded by span(); set .rows once the row count is known."""
+    __slots__ = ("name", "rows", "peak")
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+
+
+class Instrumentation:
+    """Collects timed stage spans for one run of a processor.
+
+    Stages are opened with span(), as a context manager:
+
+        with inst.span("join") as stage:
+            ...
+            stage.rows = len(result)
+
+    Each finished span is logged through this module's logger and passed
+    to on_span, e.g. to show it in a progress dialog. With trace_memory,
+    tracemalloc runs while the instrumentation is active and every span
+    records its peak traced allocations; this slows allocation-heavy code,
+    so it is off by default. tracemalloc is process-wide: while another
+    run is tracing at the same time the peaks cannot be told apart, and
+    spans that overlap it record no peak_mb. If trace_path is set a
+    Chrome trace JSON file (chrome://tracing, Perfetto, speedscope) is
+    written when the run ends.
+
+    Code further down the call stack can add spans without being handed
+    the object, through the module-level span(), while it is active().
+    """
+
+    def __init__(self, name, on_span=None, trace_memory=False, trace_path=None):
+        self.name = name
+        self.on_span = on_span
+        self.trace_memory = trace_memory
+        self.trace_path = trace_path
+        self.spans = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._tracing = False
+
+    @classmethod
+    def from_config(cls, name, on_span=None):
+        """Build from the instrumentation section of config.json.
+
+        trace_memory turns on tracemalloc; write_trace saves a trace file
+        per run under the app data 'traces' folder.
+        """
+        trace_path = None
+        if get_setting("instrumentation", "write_trace", False):
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            trace_path = os.path.join(app_data_dir("traces"), f"{name}-{stamp}.json")
+        return cls(name, on_span, get_setting("instrumentation", "trace_memory", False), trace_path)
+
+    @contextlib.contextmanager
+    def active(self):
+        """Make this the target of module-level span() calls in this context."""
+        if self.trace_memory and not self._tracing:
+            _start_tracing()
+            self._tracing = True
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+            if self._tracing:
+                _stop_tracing()
+                self._tracing = False
+            if self.trace_path:
+                self.write_trace(self.trace_path)
+
+    @contextlib.contextmanager
+    def span(self, name, rows=None):
+        stage = _OpenSpan(name, rows)
+        epoch = _sole_tracing_epoch() if self._tracing else None
+        if epoch is not None:
+            # reset_peak() below would lose the enclosing span's peak so far
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        except BaseException:
+            self._stack.pop()
+            raise
+        seconds = time.perf_counter() - start
+        self._stack.pop()
+
+        peak_mb = None
+        if epoch is not None and _sole_tracing_epoch() == epoch:
+            stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, stage.peak)
+            peak_mb = stage.peak / MB
+        span = Span(name, start - self._origin, seconds, stage.rows, peak_mb, peak_rss_mb(), len(self._stack))
+        self.spans.append(span)
+        logger.info(f"{self.name}: {describe(span)}")
+        if self.on_span:
+            self.on_span(span)
+
+    def stage_seconds(self):
+        """{stage name: seconds} in start order, for summaries."""
+        return {span.name: round(span.seconds, 3) for span in sorted(self.spans, key=lambda s: s.start)}
+
+    def write_trace(self, path):
+        """Write the spans as Chrome trace JSON; failures are only logged."""
+        trace = {
+            "traceEvents": trace_events(self.spans),
+            "displayTimeUnit": "ms",
+            "otherData": {"run": self.name},
+        }
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f)
+        except OSError as e:
+            logger.warning(f"Could not write trace {path}: {e}")
+            return None
+        logger.info(f"Wrote trace {path}")
+        return path
+
+
+def span(name, rows=None):
+    """Open a span on the active Instrumentation, or do nothing if none is."""
+    current = _current.get()
+    if current is None:
+        return contextlib.nullcontext(_OpenSpan(name, rows))
+    return current.span(name, rows)
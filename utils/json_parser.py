@@ -0,0 +1,61 @@
+import json
+
+READ_CHUNK_CHARS = 1 << 20
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_records(path, chunk_chars=READ_CHUNK_CHARS):
+    """Yield records from a JSON array, JSON Lines or single-object file.
+
+    The file is read in chunks and decoded one record at a time, so memory
+    stays proportional to the largest record rather than the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buffer, eof = "", False
+
+        def fill():
+            nonlocal buffer, eof
+            chunk = f.read(chunk_chars)
+            eof = not chunk
+            buffer += chunk
+
+        def skip(chars):
+            nonlocal buffer, pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                buffer, pos = "", 0
+                fill()
+
+        fill()
+        pos = 0
+        skip(_WHITESPACE)
+        in_array = buffer[pos:pos + 1] == "["
+        if in_array:
+            pos += 1
+
+        while True:
+            skip(_WHITESPACE + ("," if in_array else ""))
+            if pos >= len(buffer):
+                if in_array:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                return
+            if in_array and buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                complete = end < len(buffer) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                # Record runs past the buffer: drop what is consumed, read on
+                buffer, pos = buffer[pos:], 0
+                fill()
+                continue
+            pos = end
+            yield record
@@ -0,0 +1,185 @@
+from collections import namedtuple
+import importlib
+import importlib.util
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+
+logger = logging.getLogger(__name__)
+
+# Libraries that dominate import time; deferred everywhere and prewarmed
+HEAVY_MODULES = ("numpy", "pandas", "openpyxl", "lxml.etree", "docx")
+
+ImportTiming = namedtuple('ImportTiming', ['module', 'seconds', 'thread', 'trigger'])
+ImportTiming.__doc__ = """One measured in-process import.
+
+module  -- dotted module name
+seconds -- wall time spent in the import, including its own imports
+thread  -- name of the thread that paid for it
+trigger -- 'lazy' for first attribute access, 'prewarm' for background warming
+"""
+
+_timings = []
+_timings_lock = threading.Lock()
+
+
+def _record(module, seconds, trigger):
+    timing = ImportTiming(module, seconds, threading.current_thread().name, trigger)
+    with _timings_lock:
+        _timings.append(timing)
+    logger.debug(f"Imported {module} in {seconds * 1000:.1f} ms ({trigger}, {timing.thread})")
+
+
+def recorded_timings():
+    """Return the in-process import timings recorded so far, slowest first."""
+    with _timings_lock:
+        return sorted(_timings, key=lambda timing: timing.seconds, reverse=True)
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Modules keep their usual 'import pandas as pd' spelling as
+    'pd = lazy_import("pandas")'; nothing is loaded until code actually
+    touches pd.<something>, which is normally on a worker thread.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = _timed_import(self.__name__, 'lazy')
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return name's module if already imported, else a LazyModule for it."""
+    module = sys.modules.get(name)
+    if module is not None and not isinstance(module, LazyModule):
+        return module
+    return LazyModule(name)
+
+
+def is_available(name):
+    """True if name can be imported, checked without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _timed_import(name, trigger):
+    already = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not already:
+        _record(name, time.perf_counter() - start, trigger)
+    return module
+
+
+def prewarm(module_names, cancel_token=None):
+    """Import module_names in order, skipping ones that fail.
+
+    Meant to run on a background thread once the window is up, so the
+    first click on a tool does not pay for its imports. Returns the
+    names that could not be imported.
+    """
+    failed = []
+    for name in module_names:
+        if cancel_token is not None and cancel_token.is_cancelled:
+            break
+        try:
+            _timed_import(name, 'prewarm')
+        except Exception as e:
+            logger.warning(f"Prewarm could not import {name}: {e}")
+            failed.append(name)
+    return failed
+
+
+# --- Cold import report -------------------------------------------------------
+
+ImportTimeEntry = namedtuple('ImportTimeEntry', ['module', 'self_us', 'cumulative_us', 'depth'])
+ImportTimeEntry.__doc__ = """One line of python -X importtime output.
+
+module        -- dotted module name
+self_us       -- microseconds spent in the module body itself
+cumulative_us -- microseconds including the module's own imports
+depth         -- nesting level; 0 for the modules imported directly
+"""
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def parse_importtime(text):
+    """Parse python -X importtime stderr into ImportTimeEntry tuples."""
+    entries = []
+    for line in text.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append(ImportTimeEntry(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure_cold_imports(module_names, preload=("PyQt5.QtWidgets",), timeout=120, cwd=None):
+    """Import module_names in a fresh interpreter under -X importtime.
+
+    preload is imported first and excluded from the totals, since the
+    launcher has already paid for it. Returns ImportTimeEntry tuples for
+    everything module_names pulled in, slowest cumulative first.
+    """
+    marker = "__elkrun_importtime_marker__"
+    code = "; ".join(
+        [f"import {name}" for name in preload]
+        + [f"import sys; sys.stderr.write('{marker}\\n')"]
+        + [f"import {name}" for name in module_names]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, timeout=timeout, cwd=cwd,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    measured = result.stderr.split(marker, 1)[-1]
+    return sorted(parse_importtime(measured), key=lambda entry: entry.cumulative_us, reverse=True)
+
+
+def format_import_report(cold_entries=None, limit=25):
+    """Render recorded timings, and optionally a cold report, as text."""
+    lines = ["In-process imports (slowest first):"]
+    timings = recorded_timings()
+    if not timings:
+        lines.append("  none recorded yet")
+    for timing in timings[:limit]:
+        lines.append(f"  {timing.seconds * 1000:8.1f} ms  {timing.module:<32} {timing.trigger:<8} {timing.thread}")
+
+    if cold_entries is not None:
+        top_level = [entry for entry in cold_entries if entry.depth == 0]
+        total_ms = sum(entry.cumulative_us for entry in top_level) / 1000
+        lines += ["", f"Cold import in a fresh interpreter: {total_ms:.1f} ms total", "  cumulative      self  module"]
+        for entry in cold_entries[:limit]:
+            lines.append(f"  {entry.cumulative_us / 1000:8.1f} ms {entry.self_us / 1000:7.1f} ms  "
+                         f"{'  ' * entry.depth}{entry.module}")
+    return "\n".join(lines)
@@ -0,0 +1,80 @@
+import contextlib
+import json
+import logging
+import logging.config
+import logging.handlers
+import multiprocessing
+import os
+from utils.file_manager import app_data_dir
+
+LOGGING_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "logging_config.json")
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_configured = False
+
+
+def configure_logging(path=None):
+    """Set up logging from config/logging_config.json (dictConfig schema).
+
+    Relative handler filenames are placed in the app data 'logs' folder.
+    Falls back to INFO on the console if the file is missing or invalid.
+    Only the first call has an effect.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    path = path or LOGGING_CONFIG_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        for handler in config.get("handlers", {}).values():
+            if "filename" in handler and not os.path.isabs(handler["filename"]):
+                handler["filename"] = os.path.join(app_data_dir("logs"), handler["filename"])
+        logging.config.dictConfig(config)
+    except (OSError, ValueError, TypeError) as e:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+        logging.getLogger(__name__).warning(f"Using default logging; could not apply {path}: {e}")
+
+
+class _Dispatch(logging.Handler):
+    """Hands a forwarded record to its logger, so this process's config applies."""
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+@contextlib.contextmanager
+def forward_worker_logs():
+    """Yield a queue that pool workers log into; see configure_worker_logging.
+
+    Records put on the queue are replayed through this process's loggers,
+    so only this process writes the rotating log files. Pass the queue to
+    each worker's initializer.
+    """
+    queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(queue, _Dispatch())
+    listener.start()
+    try:
+        yield queue
+    finally:
+        listener.stop()
+        queue.close()
+
+
+def configure_worker_logging(queue, level=logging.INFO):
+    """Send every record of a pool worker to the parent through queue.
+
+    Replaces any handlers the worker set up, so worker processes never
+    open the log files themselves; concurrent rollover of one
+    RotatingFileHandler from several processes fails on Windows.
+    """
+    global _configured
+    _configured = True
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(queue))
+    root.setLevel(level)
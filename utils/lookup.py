@@ -0,0 +1,65 @@
+from collections import namedtuple
+from utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+DUPLICATE_POLICIES = ('first', 'last', 'error')
+
+LookupIndex = namedtuple('LookupIndex', ['values', 'duplicates'])
+LookupIndex.__doc__ = """Hash index from normalized key to value.
+
+values     -- Series indexed by unique key
+duplicates -- sorted list of keys that appeared more than once in the source
+"""
+
+
+class DuplicateKeyError(ValueError):
+    """Raised when a lookup source repeats a key and the policy is 'error'."""
+
+    def __init__(self, source, keys):
+        self.source = source
+        self.keys = keys
+        preview = ", ".join(keys[:10]) + (" ..." if len(keys) > 10 else "")
+        super().__init__(f"{len(keys)} duplicate account(s) in {source}: {preview}")
+
+
+def build_lookup_index(keys, values, on_duplicate='first', source='lookup source'):
+    """Build a key -> value index once per source.
+
+    Blank keys and missing values are ignored, so unmatched rows never join
+    on '' and a missing value reads the same as a missing key. A key that
+    appears more than once is resolved by on_duplicate: keep the 'first' or
+    'last' occurrence, or raise DuplicateKeyError for 'error'. Either way
+    the repeated keys are reported in LookupIndex.duplicates.
+    """
+    if on_duplicate not in DUPLICATE_POLICIES:
+        raise ValueError(f"on_duplicate must be one of {DUPLICATE_POLICIES}")
+
+    keys = pd.Series(keys).reset_index(drop=True)
+    values = pd.Series(values).reset_index(drop=True)
+    present = keys.notna() & (keys != '') & values.notna()
+    keys, values = keys[present], values[present]
+
+    repeated = keys.duplicated(keep=False)
+    duplicates = sorted(keys[repeated].unique().tolist())
+    if duplicates and on_duplicate == 'error':
+        raise DuplicateKeyError(source, duplicates)
+
+    keep = ~keys.duplicated(keep=on_duplicate)
+    return LookupIndex(pd.Series(values[keep].to_numpy(), index=keys[keep].to_numpy()), duplicates)
+
+
+def lookup_values(index, keys, default=None):
+    """Map keys through a LookupIndex in one vectorised pass.
+
+    The result is aligned with keys; keys with no entry get default.
+    """
+    keys = pd.Series(keys)
+    result = np.full(len(keys), default, dtype=object)
+    if len(index.values):
+        # get_indexer is a single hash probe per key; -1 marks a miss
+        positions = index.values.index.get_indexer(keys.to_numpy())
+        found = positions >= 0
+        result[found] = index.values.to_numpy(dtype=object)[positions[found]]
+    return pd.Series(result, index=keys.index, name=keys.name)
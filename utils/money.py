@@ -0,0 +1,57 @@
+from utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Excel number format for currency cells: $1,234.50 and ($1,234.50)
+EXCEL_MONEY_FORMAT = '"$"#,##0.00_);\\("$"#,##0.00\\)'
+
+# Currency symbols and stray whitespace, removed before the sign check
+_MONEY_NOISE = r'[$\s]'
+# Thousands separators and the parentheses of accounting-style negatives
+_MONEY_PUNCTUATION = r'[,()]'
+
+
+def parse_money(values):
+    """Convert a column of amounts like '$1,234.50' or '(12.00)' to floats.
+
+    Parentheses mark a negative amount. Blank, missing and unparseable
+    values become NaN. Numeric input is passed through as float64. The
+    result is aligned with values.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype('float64')
+
+    text = values.astype('string').str.replace(_MONEY_NOISE, '', regex=True)
+    negative = (text.str.startswith('(') & text.str.endswith(')')).fillna(False).astype(bool)
+    amounts = pd.to_numeric(text.str.replace(_MONEY_PUNCTUATION, '', regex=True), errors='coerce')
+    amounts = pd.Series(amounts.to_numpy(dtype='float64', na_value=np.nan), index=values.index, name=values.name)
+    return amounts.where(~negative, -amounts)
+
+
+def parse_amount(value):
+    """Parse a single amount with the rules of parse_money.
+
+    Raises ValueError if value is not a valid amount.
+    """
+    amount = parse_money([value]).iloc[0]
+    if np.isnan(amount):
+        raise ValueError(f"Invalid dollar amount: {value}")
+    return float(amount)
+
+
+def format_money(values, decimals=0):
+    """Format a column of amounts as '$1,235' strings, negatives as '-$1,235'.
+
+    Strings are parsed with parse_money first; missing values become ''.
+    Each distinct amount is formatted once.
+    """
+    amounts = parse_money(values).round(decimals)
+    codes, uniques = pd.factorize(amounts)
+    labels = np.array(
+        [f"-${-x:,.{decimals}f}" if x < 0 else f"${x:,.{decimals}f}" for x in uniques] + [''],
+        dtype=object,
+    )
+    # Missing amounts have code -1, which picks the trailing ''
+    return pd.Series(labels[codes], index=amounts.index, name=amounts.name)
@@ -0,0 +1,82 @@
+from utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Whole floats at or above this do not fit in int64
+INT64_LIMIT = 2.0 ** 63
+
+
+def normalize_account_numbers(values):
+    """Reduce account identifiers to bare digits without leading zeros.
+
+    Accepts any array-like and returns an object Series of str aligned with
+    it. Separators and prefixes are dropped ("XX-001234" -> "1234") and
+    whole numbers that went through a float keep their integer digits
+    (12345.0 and "12345.00" -> "12345"). Missing values become ''.
+
+    Numeric columns are converted arithmetically. Text goes through
+    pandas' vectorized string methods. In mixed columns, as openpyxl reads
+    them, the float cells are picked out and converted arithmetically too,
+    so 1e20 gives the same digits in either kind of column.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_integer_dtype(series.dtype) or pd.api.types.is_float_dtype(series.dtype):
+        result = _normalize_numeric(series)
+    else:
+        result = _normalize_mixed(series.to_numpy(dtype=object))
+    return pd.Series(result, index=series.index, name=series.name, dtype=object)
+
+
+def _normalize_mixed(values):
+    # str() of a large float is scientific notation ('1e+20'), whose digits
+    # are not the account number, so floats take the numeric path
+    floats = np.fromiter((isinstance(value, (float, np.floating)) for value in values),
+                         dtype=bool, count=len(values))
+    if not floats.any():
+        # str() of None has no digits, so missing values come out as ''
+        return _digits_only(values)
+    result = np.empty(len(values), dtype=object)
+    result[floats] = _normalize_numeric(pd.Series(values[floats], dtype='float64'))
+    result[~floats] = _digits_only(values[~floats])
+    return result
+
+
+def _digits_only(text):
+    """Digits-only / strip-float-suffix / lstrip('0') on an array of values."""
+    strings = pd.Series(text, dtype=object).astype(str)
+    digits = (
+        strings
+        # A trailing ".0", ".00"... after a digit is a float artefact: drop it
+        .str.replace(r'(\d)\.0+$', r'\1', regex=True)
+        .str.replace(r'\D', '', regex=True)
+        .str.lstrip('0')
+        .fillna('')
+    )
+    return digits.to_numpy(dtype=object)
+
+
+def _normalize_numeric(series):
+    result = np.full(len(series), '', dtype=object)
+    if pd.api.types.is_integer_dtype(series.dtype):
+        # Exact for every integer width, including uint64 beyond int64
+        present = series.notna().to_numpy()
+        digits = series[present].astype(str).str.lstrip('-').str.lstrip('0')
+        result[present] = digits.to_numpy(dtype=object)
+        return result
+
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    present = np.flatnonzero(np.isfinite(values))
+    magnitude = np.abs(values[present])
+    whole = magnitude == np.floor(magnitude)
+    fits = whole & (magnitude < INT64_LIMIT)
+    if fits.any():
+        digits = pd.Series(magnitude[fits]).astype('int64').astype(str).str.lstrip('0')
+        result[present[fits]] = digits.to_numpy(dtype=object)
+    big = whole & ~fits
+    if big.any():
+        # Rare; formatted one by one since astype('int64') would overflow
+        result[present[big]] = [f"{value:.0f}".lstrip('0') for value in magnitude[big]]
+    if not whole.all():
+        result[present[~whole]] = _digits_only(series.iloc[present[~whole]].astype(str).to_numpy(dtype=object))
+    return result
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from utils.config import get_setting
+from utils.file_manager import app_data_dir
+from utils.lazy_import import is_available, lazy_import
+
+pd = lazy_import('pandas')
+HAVE_FEATHER = is_available('pyarrow')
+
+logger = logging.getLogger(__name__)
+
+# Bump when a cached loader's output format changes to invalidate old entries
+CACHE_FORMAT = 2
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+INDEX_FILE = "index.json"
+# Paths remembered in the index; staged copies get a new path every run.
+# Past the limit it is pruned down to PRUNED_INDEX_ENTRIES, so the existence
+# checks (often network stats) run once per few hundred new paths.
+MAX_INDEX_ENTRIES = 1000
+PRUNED_INDEX_ENTRIES = 750
+
+
+class ParseCache:
+    """On-disk cache of parsed input files, shared across runs.
+
+    Entries are keyed by the content hash of the source file plus a
+    description of how it was parsed, so a renamed or copied file still
+    hits and an edited one misses. The hash of each path is remembered
+    together with its size and mtime, so an unchanged file is not re-read
+    just to be hashed again. Once more than MAX_INDEX_ENTRIES paths are
+    remembered, paths that no longer exist are dropped, then the oldest.
+    DataFrames are stored as Feather when pyarrow is available and pickled
+    otherwise. Least recently used entries are evicted once the directory
+    exceeds max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory or app_data_dir("parse_cache")
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._index = self._read_index()
+
+    # -- public API -----------------------------------------------------------
+
+    def get(self, path, parse_key, loader):
+        """Return loader() for path, from cache when the content is unchanged."""
+        entry = self._entry_path(self.content_hash(path), parse_key)
+        with self._lock:
+            for candidate in (entry + ".feather", entry + ".pkl"):
+                if os.path.exists(candidate):
+                    try:
+                        result = self._load(candidate)
+                    except FileNotFoundError:
+                        # Evicted by another process since the exists() check
+                        continue
+                    except Exception as e:
+                        logger.warning(f"Discarding unreadable cache entry {candidate}: {e}")
+                        _remove_quietly(candidate)
+                        break
+                    try:
+                        os.utime(candidate)  # mark as recently used
+                    except OSError:
+                        pass
+                    return result
+
+        result = loader()
+        with self._lock:
+            self._store(entry, result)
+            self.evict()
+        return result
+
+    def content_hash(self, path):
+        """SHA-256 of the file, reusing the last hash if size and mtime match."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            known = self._index.get(path)
+            if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                return known["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+
+        with self._lock:
+            # Re-insert so the dict stays ordered oldest hash first
+            self._index.pop(path, None)
+            self._index[path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest.hexdigest(),
+            }
+            self._write_index()
+        return digest.hexdigest()
+
+    def evict(self):
+        """Delete least recently used entries until under max_bytes.
+
+        Other processes share the directory and may delete entries at the
+        same time, so files that vanish midway are simply skipped.
+        """
+        with self._lock:
+            entries = []
+            try:
+                names = os.listdir(self.directory)
+            except OSError as e:
+                logger.warning(f"Could not list cache directory {self.directory}: {e}")
+                return
+            for name in names:
+                if name == INDEX_FILE or name.endswith(".tmp"):
+                    continue
+                full = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full))
+            total = sum(size for _, size, _ in entries)
+            for _, size, full in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                _remove_quietly(full)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.directory):
+                _remove_quietly(os.path.join(self.directory, name))
+            self._index = {}
+
+    # -- storage ----------------------------------------------------------------
+
+    def _entry_path(self, content_hash, parse_key):
+        key = hashlib.sha1(f"{CACHE_FORMAT}:{content_hash}:{parse_key}".encode()).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def _store(self, entry, value):
+        feather = HAVE_FEATHER and isinstance(value, pd.DataFrame) and _feather_safe(value)
+        target = entry + (".feather" if feather else ".pkl")
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            if feather:
+                value.to_feather(tmp_path)
+            else:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, target)
+        except Exception as e:
+            # A cache that cannot be written should never fail the caller
+            logger.warning(f"Could not write cache entry {target}: {e}")
+            _remove_quietly(tmp_path)
+
+    @staticmethod
+    def _load(path):
+        if path.endswith(".feather"):
+            return pd.read_feather(path)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _prune_index(self):
+        """Past MAX_INDEX_ENTRIES, keep the newest paths that still exist."""
+        if len(self._index) <= MAX_INDEX_ENTRIES:
+            return
+        existing = [(path, known) for path, known in self._index.items() if os.path.exists(path)]
+        self._index = dict(existing[-PRUNED_INDEX_ENTRIES:])
+
+    def _write_index(self):
+        self._prune_index()
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+        except OSError as e:
+            # The index only saves re-hashing; losing an update is harmless
+            logger.warning(f"Could not write cache index: {e}")
+            if tmp_path:
+                _remove_quietly(tmp_path)
+
+
+def _remove_quietly(path):
+    """Delete path, ignoring files already removed or locked by another process."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _feather_safe(frame):
+    """Feather needs a default RangeIndex and string column names."""
+    index = frame.index
+    return (
+        isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+        and index.name is None and all(isinstance(col, str) for col in frame.columns)
+    )
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Return the shared ParseCache configured from config.json."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            max_mb = get_setting("parse_cache", "max_size_mb", 512)
+            _default_cache = ParseCache(max_bytes=int(max_mb) * 1024 * 1024)
+        return _default_cache
+
+
+def cached_call(fn, path, *args, **kwargs):
+    """Call fn(path, *args, **kwargs) through the shared parse cache.
+
+    The cache key includes fn's qualified name and the extra arguments, so
+    the same file parsed two different ways gets two entries. Bypassed
+    entirely when parse_cache.enabled is false in config.json.
+    """
+    if not get_setting("parse_cache", "enabled", True):
+        return fn(path, *args, **kwargs)
+    parse_key = f"{fn.__module__}.{fn.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+    return default_cache().get(path, parse_key, lambda: fn(path, *args, **kwargs))
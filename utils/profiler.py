@@ -0,0 +1,235 @@
+from collections import Counter, namedtuple
+import contextlib
+import cProfile
+import glob
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+from datetime import datetime
+from utils.config import get_setting
+from utils.file_manager import app_data_dir
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "ELKRUN_PROFILE"
+DEFAULT_KEEP_RUNS = 20
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+STATS_EXT = ".pstats"
+COLLAPSED_EXT = ".collapsed"
+
+ProfileRun = namedtuple('ProfileRun', ['name', 'started', 'stats_path', 'collapsed_path'])
+ProfileRun.__doc__ = """One saved profiling run.
+
+name           -- what was profiled, e.g. 'structured_notes' or 'agenda_gen-ui'
+started        -- datetime the run started
+stats_path     -- cProfile output, loadable with pstats or snakeviz; None if cProfile was unavailable
+collapsed_path -- sampled stacks in collapsed format, for flamegraph.pl or speedscope
+"""
+
+HotFunction = namedtuple('HotFunction', ['function', 'calls', 'tottime', 'cumtime'])
+HotFunction.__doc__ = """A function's totals from a .pstats file.
+
+function -- 'file:line(name)'
+calls    -- primitive call count
+tottime  -- seconds spent in the function itself
+cumtime  -- seconds including everything it called
+"""
+
+# Runtime override from the Tools menu; None defers to the env var and config
+_enabled_override = None
+
+
+def is_enabled():
+    """True if runs should be profiled.
+
+    Set from the Tools menu for this session, or else by ELKRUN_PROFILE=1
+    in the environment or profiling.enabled in config.json.
+    """
+    if _enabled_override is not None:
+        return _enabled_override
+    env = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if env:
+        return env not in ("0", "false", "no", "off")
+    return bool(get_setting("profiling", "enabled", False))
+
+
+def set_enabled(enabled):
+    """Turn profiling on or off for the rest of this session."""
+    global _enabled_override
+    _enabled_override = bool(enabled)
+
+
+def profile_dir():
+    return app_data_dir("profiles")
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer.
+
+    Counts identical stacks, so the result is a collapsed-stack profile
+    ('outer;inner;innermost count' per line). Unlike cProfile it shows
+    where wall time goes, including time blocked in I/O or C code.
+    """
+
+    def __init__(self, thread_id, interval=DEFAULT_SAMPLE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """Profiles the thread that calls start() until stop().
+
+    Records deterministic cProfile stats and, alongside, a sampled
+    collapsed-stack profile. stop() saves both under profile_dir() as
+    '<timestamp>-<name>.pstats' and '.collapsed', and removes the oldest
+    runs beyond profiling.keep_runs. With deterministic=False only the
+    sampler runs; long-lived sessions use that so they never hold the one
+    cProfile slot Python 3.12+ allows that script jobs need.
+    """
+
+    def __init__(self, name, directory=None, interval_ms=None, deterministic=True):
+        self.name = name
+        self.directory = directory or profile_dir()
+        interval_ms = interval_ms or get_setting("profiling", "sample_interval_ms", DEFAULT_SAMPLE_INTERVAL_MS)
+        self.interval = interval_ms / 1000
+        self.deterministic = deterministic
+        self.started = None
+        self._profile = None
+        self._sampler = None
+
+    def start(self):
+        self.started = datetime.now()
+        self._profile = None
+        if self.deterministic:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError as e:
+                # Only one cProfile may be active at a time on Python 3.12+
+                logger.warning(f"cProfile unavailable for {self.name}, sampling only: {e}")
+                self._profile = None
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop profiling and save the run; returns its ProfileRun."""
+        if self._profile is not None:
+            self._profile.disable()
+        self._sampler.stop()
+
+        safe_name = re.sub(r"[^\w.-]+", "_", self.name)
+        stem = os.path.join(self.directory, f"{self.started:%Y%m%d-%H%M%S-%f}-{safe_name}")
+        stats_path = None
+        try:
+            if self._profile is not None:
+                stats_path = stem + STATS_EXT
+                self._profile.dump_stats(stats_path)
+            self._sampler.write(stem + COLLAPSED_EXT)
+        except OSError as e:
+            logger.warning(f"Could not save profile for {self.name}: {e}")
+            return None
+        rotate(self.directory)
+        logger.info(f"Saved profile of {self.name} to {stem}.*")
+        return ProfileRun(self.name, self.started, stats_path, stem + COLLAPSED_EXT)
+
+
+@contextlib.contextmanager
+def profile(name):
+    """Profile the body on this thread if profiling is enabled."""
+    if not is_enabled():
+        yield None
+        return
+    session = ProfileSession(name)
+    session.start()
+    try:
+        yield session
+    finally:
+        session.stop()
+
+
+def _run_from_collapsed(path):
+    stem = path[:-len(COLLAPSED_EXT)]
+    # '<YYYYmmdd>-<HHMMSS>-<microseconds>-<name>'
+    parts = os.path.basename(stem).split("-", 3)
+    try:
+        started = datetime.strptime("-".join(parts[:3]), "%Y%m%d-%H%M%S-%f")
+        name = parts[3]
+    except (ValueError, IndexError):
+        started = datetime.fromtimestamp(os.path.getmtime(path))
+        name = os.path.basename(stem)
+    stats_path = stem + STATS_EXT
+    return ProfileRun(name, started, stats_path if os.path.exists(stats_path) else None, path)
+
+
+def list_runs(directory=None):
+    """Saved runs, newest first."""
+    paths = glob.glob(os.path.join(directory or profile_dir(), "*" + COLLAPSED_EXT))
+    return sorted((_run_from_collapsed(path) for path in paths), key=lambda run: run.started, reverse=True)
+
+
+def rotate(directory=None, keep=None):
+    """Delete all but the newest keep runs."""
+    keep = keep if keep is not None else get_setting("profiling", "keep_runs", DEFAULT_KEEP_RUNS)
+    for run in list_runs(directory)[keep:]:
+        for path in (run.stats_path, run.collapsed_path):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def top_functions(stats_path, sort="tottime", limit=25):
+    """The limit hottest functions of a .pstats file as HotFunction tuples."""
+    stats = pstats.Stats(stats_path)
+    rows = []
+    for (filename, line, name), (prim_calls, _calls, tottime, cumtime, _callers) in stats.stats.items():
+        function = name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+        rows.append(HotFunction(function, prim_calls, tottime, cumtime))
+    rows.sort(key=lambda row: getattr(row, sort), reverse=True)
+    return rows[:limit]
+
+
+def format_hot_functions(rows):
+    lines = [f"{'tottime':>9} {'cumtime':>9} {'calls':>9}  function"]
+    for row in rows:
+        lines.append(f"{row.tottime:>9.3f} {row.cumtime:>9.3f} {row.calls:>9,}  {row.function}")
+    return "\n".join(lines)
+
+
+def top_stacks(collapsed_path, limit=25):
+    """The limit most sampled stacks as (count, stack) pairs."""
+    with open(collapsed_path, encoding="utf-8") as f:
+        pairs = [line.rstrip("\n").rsplit(" ", 1) for line in f if line.strip()]
+    counts = sorted(((int(count), stack) for stack, count in pairs), reverse=True)
+    return counts[:limit]
@@ -0,0 +1,65 @@
+import time
+from utils.instrument import describe
+
+CHUNK_ROWS = 5000
+
+
+class StageProgress:
+    """Turns per-stage row counts into overall percentages and messages.
+
+    stages maps stage name -> relative weight, in the order they run.
+    update() reports e.g. "Matching accounts: 12,000 / 50,000 rows
+    (85,000 rows/s)" at the stage's share of 0-100. Passing the script
+    runner's progress_callback makes every update a cancellation point,
+    and cancel_token, if given, is checked as well.
+    """
+
+    def __init__(self, callback, stages, cancel_token=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        total = float(sum(stages.values())) or 1.0
+        self._start = {}
+        offset = 0.0
+        for name, weight in stages.items():
+            self._start[name] = (offset / total * 100, weight / total * 100)
+            offset += weight
+        self._stage_started = {}
+        self._value = 0
+
+    def check_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def update(self, stage, done=0, total=None, message=None, unit="rows"):
+        """Report progress within stage; done/total are row counts."""
+        self.check_cancelled()
+        now = time.perf_counter()
+        started = self._stage_started.setdefault(stage, now)
+        start, span = self._start[stage]
+        fraction = min(done / total, 1.0) if total else 0.0
+        text = message or stage
+        if total:
+            text += f": {done:,} / {total:,} {unit}"
+            elapsed = now - started
+            if done and elapsed > 0:
+                text += f" ({done / elapsed:,.0f} {unit}/s)"
+        self._value = int(start + span * fraction)
+        if self.callback:
+            self.callback(self._value, text)
+
+    def report_span(self, span):
+        """Show a finished instrumentation Span; use as Instrumentation.on_span."""
+        self.check_cancelled()
+        if self.callback:
+            self.callback(self._value, describe(span))
+
+    def rows_callback(self, stage, message=None, unit="rows"):
+        """Return an (done, total) callback that reports into stage."""
+        self._stage_started.setdefault(stage, time.perf_counter())
+        return lambda done, total: self.update(stage, done, total, message, unit)
+
+
+def iter_chunks(length, chunk_rows=CHUNK_ROWS):
+    """Yield (start, stop) bounds covering range(length) in chunks."""
+    for start in range(0, length, chunk_rows):
+        yield start, min(start + chunk_rows, length)
@@ -0,0 +1,224 @@
+from collections import namedtuple
+import ast
+import json
+import logging
+import os
+import tempfile
+import threading
+from utils.file_manager import app_data_dir
+
+logger = logging.getLogger(__name__)
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+# Bump when ScriptInfo or the metadata rules change to drop cached entries
+REGISTRY_FORMAT = 1
+META_NAME = "SCRIPT_META"
+DEFAULT_ORDER = 100
+
+ScriptInfo = namedtuple('ScriptInfo', ['module', 'name', 'description', 'order', 'has_run'])
+ScriptInfo.__doc__ = """A tool found in the scripts folder.
+
+module      -- module name inside the scripts package, e.g. 'agenda_gen'
+name        -- display name from SCRIPT_META, else the module name in Title Case
+description -- one-line description for tooltips, may be ''
+order       -- sort key from SCRIPT_META; scripts with equal order sort by name
+has_run     -- True if the module defines a top-level run()
+"""
+
+
+def is_script_filename(filename):
+    """True for 'name.py' where name is a public, importable module name."""
+    module, ext = os.path.splitext(filename)
+    return ext == '.py' and module.isidentifier() and not module.startswith('_')
+
+
+def sort_key(info):
+    """Sidebar order: SCRIPT_META order, then display name."""
+    return info.order, info.name.lower()
+
+
+def default_display_name(module):
+    return " ".join(word.capitalize() for word in module.split('_'))
+
+
+def read_script_info(path):
+    """Read a script's metadata from its source without importing it.
+
+    Returns None if the file is not a launchable tool: it must define a
+    top-level load_ui(). Metadata comes from an optional module-level
+    SCRIPT_META dict literal with 'name', 'description' and 'order' keys;
+    a SCRIPT_META that is not a dict, or an order that is not a number,
+    is logged and replaced by the defaults.
+    """
+    module = os.path.splitext(os.path.basename(path))[0]
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    functions = {node.name for node in tree.body if isinstance(node, ast.FunctionDef)}
+    if 'load_ui' not in functions:
+        return None
+
+    meta = {}
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == META_NAME):
+            try:
+                meta = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError, RecursionError):
+                meta = None
+            if not isinstance(meta, dict):
+                logger.warning(f"{path}: {META_NAME} must be a literal dict; ignoring it")
+                meta = {}
+            break
+
+    try:
+        order = int(meta.get('order', DEFAULT_ORDER))
+    except (TypeError, ValueError, OverflowError):
+        logger.warning(f"{path}: {META_NAME} order must be a number; using {DEFAULT_ORDER}")
+        order = DEFAULT_ORDER
+
+    return ScriptInfo(
+        module=module,
+        name=str(meta.get('name') or default_display_name(module)),
+        description=str(meta.get('description', '')),
+        order=order,
+        has_run='run' in functions,
+    )
+
+
+class ScriptRegistry:
+    """Catalogue of the tools in the scripts folder.
+
+    Script files are parsed with ast rather than imported, so listing them
+    never pulls in their dependencies. Parsed entries are remembered with
+    each file's size and mtime, in memory and in a small JSON file under
+    the app data folder, so a file is only parsed again once it changes.
+    Files whose names are not valid module names (e.g. '[other_script].py')
+    and modules without load_ui() are left out.
+    """
+
+    def __init__(self, scripts_dir=None, cache_path=None):
+        self.scripts_dir = os.path.abspath(scripts_dir or SCRIPTS_DIR)
+        self.cache_path = cache_path or os.path.join(app_data_dir(), "script_registry.json")
+        self._lock = threading.Lock()
+        self._entries = self._read_cache()
+        self._scripts = {}
+
+    def scan(self):
+        """Return the ScriptInfo of every tool, sorted for display."""
+        with self._lock:
+            seen, changed = set(), False
+            with os.scandir(self.scripts_dir) as it:
+                for entry in it:
+                    if not is_script_filename(entry.name):
+                        continue
+                    seen.add(entry.name)
+                    changed |= self._refresh(entry.name, entry.stat())
+
+            for name in set(self._entries) - seen:
+                del self._entries[name]
+                changed = True
+            if changed:
+                self._write_cache()
+            return self._publish()
+
+    def refresh_files(self, filenames):
+        """Re-read only the given script files and report what changed.
+
+        Returns (added, removed, changed): ScriptInfo lists for tools that
+        appeared or whose file changed, and module names of tools that are
+        gone, either deleted or no longer defining load_ui().
+        """
+        with self._lock:
+            before = dict(self._scripts)
+            touched, dirty = set(), False
+            for filename in filenames:
+                if not is_script_filename(filename):
+                    continue
+                touched.add(os.path.splitext(filename)[0])
+                try:
+                    stat = os.stat(os.path.join(self.scripts_dir, filename))
+                except FileNotFoundError:
+                    dirty |= self._entries.pop(filename, None) is not None
+                    continue
+                if self._refresh(filename, stat):
+                    dirty = True
+                else:
+                    touched.discard(os.path.splitext(filename)[0])
+            if dirty:
+                self._write_cache()
+            self._publish()
+
+            added = [self._scripts[m] for m in touched if m in self._scripts and m not in before]
+            changed = [self._scripts[m] for m in touched if m in self._scripts and m in before]
+            removed = [m for m in touched if m in before and m not in self._scripts]
+            return added, removed, changed
+
+    def known_files(self):
+        """Filenames seen by the last scan or refresh, valid tools or not."""
+        with self._lock:
+            return set(self._entries)
+
+    def _publish(self):
+        infos = [ScriptInfo(*entry['info']) for entry in self._entries.values() if entry['info']]
+        self._scripts = {info.module: info for info in infos}
+        return sorted(infos, key=sort_key)
+
+    def get(self, module):
+        """Return the ScriptInfo for module from the last scan, or None."""
+        return self._scripts.get(module)
+
+    def _refresh(self, filename, stat):
+        """Re-parse filename if it changed; return True if the cache changed."""
+        known = self._entries.get(filename)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return False
+        path = os.path.join(self.scripts_dir, filename)
+        try:
+            info = read_script_info(path)
+        except Exception as e:
+            # One bad script file must never keep the sidebar from loading
+            logger.warning(f"Skipping script {path}: {e}")
+            # Keep listing a known tool while it is mid-edit and does not parse
+            info = ScriptInfo(*known['info']) if known and known['info'] else None
+        self._entries[filename] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'info': list(info) if info else None,
+        }
+        return True
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cached.get('format') != REGISTRY_FORMAT or cached.get('scripts_dir') != self.scripts_dir:
+            return {}
+        return cached.get('entries', {})
+
+    def _write_cache(self):
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(self.cache_path))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'format': REGISTRY_FORMAT,
+                    'scripts_dir': self.scripts_dir,
+                    'entries': self._entries,
+                }, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # The cache only saves parsing time; never fail the scan over it
+            logger.warning(f"Could not write script registry cache: {e}")
+
+
+_default_registry = None
+
+
+def default_registry():
+    """Return the shared ScriptRegistry for the bundled scripts folder."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ScriptRegistry()
+    return _default_registry
@@ -0,0 +1,135 @@
+import inspect
+import itertools
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.profiler import profile
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a ScriptWorker. Delivered on the GUI thread."""
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str, str)
+    cancelled = pyqtSignal()
+
+
+class ScriptWorker(QRunnable):
+    """Run a callable on a pool thread, streaming progress over signals.
+
+    If the callable accepts ``progress_callback`` and/or ``cancel_token``
+    keyword arguments they are passed in. Calling the progress callback
+    after cancellation raises OperationCancelled, so existing code that
+    reports progress between stages stops at the next report. When
+    profiling is enabled the call is profiled under the job's name.
+    """
+
+    def __init__(self, job_id, name, fn, *args, **kwargs):
+        super().__init__()
+        self.job_id = job_id
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancellationToken()
+        self.signals = WorkerSignals()
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self.token.cancel()
+
+    def report_progress(self, value, message):
+        self.token.raise_if_cancelled()
+        self.signals.progress.emit(int(value), message)
+
+    def _call_kwargs(self):
+        kwargs = dict(self.kwargs)
+        try:
+            params = inspect.signature(self.fn).parameters
+        except (TypeError, ValueError):
+            return kwargs
+        accepts_any = any(p.kind == p.VAR_KEYWORD for p in params.values())
+        if accepts_any or 'progress_callback' in params:
+            kwargs.setdefault('progress_callback', self.report_progress)
+        if accepts_any or 'cancel_token' in params:
+            kwargs.setdefault('cancel_token', self.token)
+        return kwargs
+
+    def run(self):
+        try:
+            self.token.raise_if_cancelled()
+            with profile(self.name):
+                result = self.fn(*self.args, **self._call_kwargs())
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e), traceback.format_exc())
+        else:
+            if self.token.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+
+class ScriptRunner(QObject):
+    """Execution engine that runs script jobs concurrently on a thread pool."""
+    job_started = pyqtSignal(int, str)
+    job_finished = pyqtSignal(int, str)
+
+    def __init__(self, parent=None, pool=None, max_workers=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        if max_workers:
+            self.pool.setMaxThreadCount(max_workers)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return its ScriptWorker.
+
+        Connect to ``worker.signals`` before control returns to the event
+        loop; signals are queued, so nothing is delivered until then.
+        """
+        job_id = next(self._ids)
+        worker = ScriptWorker(job_id, name, fn, *args, **kwargs)
+        self._jobs[job_id] = worker
+        for signal in (worker.signals.finished, worker.signals.error,
+                       worker.signals.cancelled):
+            signal.connect(lambda *_, job_id=job_id: self._release(job_id))
+        self.pool.start(worker)
+        self.job_started.emit(job_id, name)
+        return worker
+
+    def cancel(self, job_id):
+        worker = self._jobs.get(job_id)
+        if worker:
+            worker.cancel()
+
+    def cancel_all(self):
+        for worker in list(self._jobs.values()):
+            worker.cancel()
+
+    def shutdown(self, timeout_ms=5000):
+        """Cancel every job and wait for the pool to drain."""
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
+
+    def active_jobs(self):
+        """Return {job_id: script name} for jobs that have not completed."""
+        return {job_id: worker.name for job_id, worker in self._jobs.items()}
+
+    def _release(self, job_id):
+        worker = self._jobs.pop(job_id, None)
+        if worker:
+            self.job_finished.emit(job_id, worker.name)
+
+
+_default_runner = None
+
+
+def default_runner():
+    """Return the process-wide ScriptRunner backed by the global thread pool."""
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = ScriptRunner()
+    return _default_runner
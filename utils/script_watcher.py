@@ -0,0 +1,97 @@
+import importlib
+import logging
+import os
+import sys
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from utils.script_registry import default_registry, is_script_filename
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_MS = 300
+
+
+class ScriptWatcher(QObject):
+    """Watches the scripts folder and hot-reloads tools as they change.
+
+    File events are collected for DEBOUNCE_MS after the last one, since
+    editors often write a file several times (or delete and recreate it)
+    per save. Only the files named in the events are re-read through the
+    registry. A changed module that is already imported is reloaded with
+    importlib.reload. Listeners get incremental signals:
+
+    script_added(info)            -- a new tool appeared
+    script_removed(module)        -- a tool was deleted or lost its load_ui()
+    script_changed(info)          -- a tool's file changed and was reloaded
+    reload_failed(module, error)  -- the changed file could not be imported
+    """
+    script_added = pyqtSignal(object)
+    script_removed = pyqtSignal(str)
+    script_changed = pyqtSignal(object)
+    reload_failed = pyqtSignal(str, str)
+
+    def __init__(self, registry=None, parent=None, debounce_ms=DEBOUNCE_MS):
+        super().__init__(parent)
+        self.registry = registry or default_registry()
+        self.scripts_dir = self.registry.scripts_dir
+        self._pending = set()
+        self._dir_changed = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._flush)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.addPath(self.scripts_dir)
+        self._watch_files(self.registry.known_files())
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+    def _watch_files(self, filenames):
+        paths = [os.path.join(self.scripts_dir, name) for name in filenames]
+        watched = set(self._watcher.files())
+        paths = [path for path in paths if path not in watched and os.path.exists(path)]
+        if paths:
+            self._watcher.addPaths(paths)
+
+    def _on_file_changed(self, path):
+        self._pending.add(os.path.basename(path))
+        self._timer.start()
+
+    def _on_directory_changed(self, _path):
+        self._dir_changed = True
+        self._timer.start()
+
+    def _flush(self):
+        filenames, self._pending = self._pending, set()
+        if self._dir_changed:
+            self._dir_changed = False
+            # Only the difference between the listing and what is known
+            current = {name for name in os.listdir(self.scripts_dir) if is_script_filename(name)}
+            filenames |= current ^ self.registry.known_files()
+            # Files replaced by a rename drop out of the watch list; re-add them
+            self._watch_files(current)
+
+        added, removed, changed = self.registry.refresh_files(filenames)
+        for module in removed:
+            sys.modules.pop(f"scripts.{module}", None)
+            self.script_removed.emit(module)
+        for info in added:
+            self.script_added.emit(info)
+        for info in changed:
+            if self.reload(info.module):
+                self.script_changed.emit(info)
+
+    def reload(self, module):
+        """Reload scripts.<module> if it is imported; False if that fails."""
+        name = f"scripts.{module}"
+        if name not in sys.modules:
+            return True
+        try:
+            importlib.reload(sys.modules[name])
+        except Exception as e:
+            logger.warning(f"Could not reload {name}: {e}")
+            self.reload_failed.emit(module, str(e))
+            return False
+        logger.info(f"Reloaded {name}")
+        return True
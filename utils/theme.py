@@ -1,5 +1,15 @@
+import logging
+import os
+from string import Template
+from types import MappingProxyType
 from PyQt5.QtGui import QColor, QFont, QPalette
 from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+logger = logging.getLogger(__name__)
+
+STYLESHEET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "styles", "main_stylesheet.qss")
 
 class Theme:
     # Modern Color Palette
@@ -18,6 +28,49 @@ class Theme:
     TEXT_DISABLED = "#ADB5BD"  # Light Gray
     BORDER = "#DEE2E6"        # Border Gray
     
+    # Named palettes for the app-wide stylesheet; "light" matches the
+    # constants above. Bump THEME_VERSION when a palette changes.
+    THEME_VERSION = 1
+    DEFAULT_THEME = "light"
+    THEMES = {
+        "light": {
+            'primary': PRIMARY,
+            'secondary': SECONDARY,
+            'accent': ACCENT,
+            'background': BACKGROUND,
+            'surface': SURFACE,
+            'surface_alt': SURFACE_ALT,
+            'border': BORDER,
+            'text_primary': TEXT_PRIMARY,
+            'text_secondary': TEXT_SECONDARY,
+            'text_disabled': TEXT_DISABLED,
+            'error': ERROR,
+            'success': SUCCESS,
+            'warning': WARNING,
+            'info': INFO,
+        },
+        "dark": {
+            'primary': "#4C6EDB",
+            'secondary': "#6F8FA6",
+            'accent': "#66999B",
+            'background': "#181A1F",
+            'surface': "#22252B",
+            'surface_alt': "#2E323A",
+            'border': "#3A3F48",
+            'text_primary': "#E9ECEF",
+            'text_secondary': "#A0A8B0",
+            'text_disabled': "#5C636A",
+            'error': "#F06272",
+            'success': "#4CC46A",
+            'warning': "#FFD454",
+            'info': "#3CC3D9",
+        },
+    }
+    current_theme = DEFAULT_THEME
+    _params_cache = {}
+    _stylesheet_cache = {}
+    _stylesheet_mtime = None
+
     # Fonts
     FONT_FAMILY = "Segoe UI"
     FONT_SIZES = {
@@ -43,153 +96,64 @@ class Theme:
         'large': 12
     }
     
-    # Component Styles
-    BUTTON_STYLE = """
-        QPushButton {{
-            background-color: {primary};
-            color: white;
-            border: none;
-            border-radius: {border_radius}px;
-            padding: 10px 20px;
-            font-family: "{font_family}";
-            font-size: 14px;
-            font-weight: 500;
-            min-width: 100px;
-        }}
-        QPushButton:hover {{
-            background-color: {secondary};
-        }}
-        QPushButton:pressed {{
-            background-color: {accent};
-        }}
-        QPushButton:disabled {{
-            background-color: {disabled};
-            color: {text_disabled};
-        }}
-    """
-    
-    SIDEBAR_STYLE = """
-        QWidget#sidebar {{
-            background-color: {surface};
-            border-right: 1px solid {border};
-        }}
-        QLabel#sidebar_title {{
-            color: {primary};
-            font-size: 18px;
-            font-weight: bold;
-            padding: 20px 0;
-            background-color: {surface};
-            border-bottom: 1px solid {border};
-        }}
-        QListWidget {{
-            background-color: {surface};
-            border: none;
-            outline: none;
-            padding: 8px;
-        }}
-        QListWidget::item {{
-            color: {text_primary};
-            padding: 12px 16px;
-            border-radius: {border_radius}px;
-            margin: 2px 8px;
-            font-size: 14px;
-        }}
-        QListWidget::item:selected {{
-            background-color: {primary};
-            color: white;
-        }}
-        QListWidget::item:hover:!selected {{
-            background-color: {surface_alt};
-        }}
-    """
-    
-    MAIN_WINDOW_STYLE = """
-        QMainWindow {{
-            background-color: {background};
-        }}
-        QWidget {{
-            font-family: "{font_family}";
-        }}
-        QLabel {{
-            color: {text_primary};
-        }}
-        QFrame#content_frame {{
-            background-color: {surface};
-            border-radius: {border_radius}px;
-            padding: 24px;
-        }}
-        QSplitter::handle {{
-            background-color: {border};
-            width: 1px;
-        }}
-    """
+    @classmethod
+    def get_style_params(cls, theme=None):
+        """Return the (read-only, memoized) style tokens for a theme"""
+        theme = theme or cls.current_theme
+        key = (theme, cls.THEME_VERSION)
+        if key not in cls._params_cache:
+            params = dict(cls.THEMES[theme])
+            params.update({
+                # Disabled fill; text_disabled on text_disabled was unreadable
+                'disabled': params['surface_alt'],
+                'font_family': cls.FONT_FAMILY,
+                'border_radius': cls.BORDER_RADIUS['medium'],
+                'border_radius_small': cls.BORDER_RADIUS['small'],
+            })
+            cls._params_cache[key] = MappingProxyType(params)
+        return cls._params_cache[key]
 
-    FILE_SECTION_STYLE = """
-        QFrame#file_section {{
-            background-color: {surface};
-            border: 1px solid {border};
-            border-radius: {border_radius}px;
-            padding: 16px;
-        }}
-        QLabel#section_title {{
-            color: {primary};
-            font-weight: bold;
-            font-size: 16px;
-            margin-bottom: 8px;
-        }}
-        QLabel#status_label {{
-            color: {text_secondary};
-            font-size: 13px;
-            margin: 4px 0;
-        }}
-    """
+    @classmethod
+    def stylesheet(cls, theme=None):
+        """Return the app-wide stylesheet rendered for a theme.
 
-    SCRIPT_LOADER_STYLE = """
-        QWidget#content_frame {{
-            background-color: {surface};
-            border-radius: {border_radius}px;
-            padding: 24px;
-        }}
-        QLabel#title {{
-            color: {primary};
-            font-size: 20px;
-            font-weight: bold;
-            margin-bottom: 16px;
-        }}
-        QLabel#description {{
-            color: {text_secondary};
-            font-size: 14px;
-            margin-bottom: 24px;
-        }}
-        QLabel#error {{
-            color: {error};
-            font-size: 14px;
-            padding: 8px;
-            background-color: {surface_alt};
-            border-radius: {border_radius}px;
-        }}
-    """
+        Rendered once per theme, THEME_VERSION and stylesheet file mtime.
+        """
+        theme = theme or cls.current_theme
+        mtime = os.path.getmtime(STYLESHEET_PATH)
+        if mtime != cls._stylesheet_mtime:
+            cls._stylesheet_cache = {}
+            cls._stylesheet_mtime = mtime
+        key = (theme, cls.THEME_VERSION)
+        if key not in cls._stylesheet_cache:
+            with open(STYLESHEET_PATH, encoding="utf-8") as f:
+                template = Template(f.read())
+            cls._stylesheet_cache[key] = template.substitute(cls.get_style_params(theme))
+        return cls._stylesheet_cache[key]
 
     @classmethod
-    def get_style_params(cls):
-        """Return a dictionary with all style parameters"""
-        return {
-            'primary': cls.PRIMARY,
-            'secondary': cls.SECONDARY,
-            'accent': cls.ACCENT,
-            'background': cls.BACKGROUND,
-            'surface': cls.SURFACE,
-            'surface_alt': cls.SURFACE_ALT,
-            'border': cls.BORDER,
-            'text_primary': cls.TEXT_PRIMARY,
-            'text_secondary': cls.TEXT_SECONDARY,
-            'text_disabled': cls.TEXT_DISABLED,
-            'disabled': cls.TEXT_DISABLED,
-            'font_family': cls.FONT_FAMILY,
-            'border_radius': cls.BORDER_RADIUS['medium'],
-            'error': cls.ERROR
-        }
-    
+    def apply(cls, app=None, theme=None):
+        """Style the whole application with one setStyleSheet call.
+
+        Also used to switch themes at runtime. An unknown theme, e.g. a
+        typo in config.json, is logged and DEFAULT_THEME is used instead.
+        """
+        theme = theme or cls.current_theme
+        if theme not in cls.THEMES:
+            logger.warning(f"Unknown theme '{theme}', using '{cls.DEFAULT_THEME}'. "
+                           f"Available: {sorted(cls.THEMES)}")
+            theme = cls.DEFAULT_THEME
+        app = app or QApplication.instance()
+        cls.current_theme = theme
+        app.setStyleSheet(cls.stylesheet(theme))
+
+    @staticmethod
+    def set_property(widget, name, value):
+        """Set a dynamic property the stylesheet selects on and re-polish."""
+        widget.setProperty(name, value)
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+
     @classmethod
     def get_title_font(cls):
         font = QFont(cls.FONT_FAMILY, cls.FONT_SIZES['h2'])